@@ -0,0 +1,106 @@
+# File: import_time.py
+#
+# Copyright (c) Lansweeper, 2022-2026
+#
+# This unpublished material is proprietary to Lansweeper.
+# All rights reserved. The methods and
+# techniques described herein are considered trade secrets
+# and/or confidential. Reproduction or distribution, in whole
+# or in part, is forbidden except by express written permission
+# of Lansweeper.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+#
+
+"""
+Benchmark the time taken to import the connector module in a fresh process, as SOAR does for every action.
+
+The module is imported with '-X importtime' in a new interpreter several times and the median of its cumulative import
+time is reported. The run fails if one of the modules imported on first use only is imported along with the connector.
+
+When a baseline is given, the run also fails if the import time exceeds the baseline by more than the tolerance.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the connector imports on first use only, they must not be imported along with it
+DEFERRED_MODULES = ("bs4", "macaddress")
+
+IMPORT_SCRIPT = (
+    f"import json, sys, lansweeper_connector; print(json.dumps([module for module in {DEFERRED_MODULES!r} if module in sys.modules]))"
+)
+
+
+def measure_import():
+    """
+    Import the connector module in a new interpreter.
+
+    :return: tuple of the cumulative import time in seconds and the list of the deferred modules that were imported
+    """
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [PACKAGE_DIR, os.environ.get("PYTHONPATH")]))}
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT], capture_output=True, text=True, env=env, cwd=PACKAGE_DIR, check=True
+    )
+    match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| lansweeper_connector$", process.stderr, re.MULTILINE)
+    return int(match.group(1)) / 1e6, json.loads(process.stdout)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argparser.add_argument("--repeat", type=int, default=20, help="number of imports")
+    argparser.add_argument("--output", help="write the result to this JSON file, e.g. to be used as a baseline")
+    argparser.add_argument("--baseline", help="compare the result with this JSON file and fail on regressions")
+    argparser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative increase of the import time")
+    args = argparser.parse_args()
+
+    durations = []
+    imported = set()
+    for _ in range(args.repeat):
+        duration, deferred_modules = measure_import()
+        durations.append(duration)
+        imported.update(deferred_modules)
+
+    result = {"import_time": statistics.median(durations)}
+    print(f"lansweeper_connector import time: {result['import_time'] * 1000:.1f} ms (median of {args.repeat})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=4)
+
+    regressions = [f"{module} is imported along with the connector" for module in sorted(imported)]
+    if args.baseline:
+        with open(args.baseline) as f:
+            reference = json.load(f)["import_time"]
+        limit = reference * (1 + args.tolerance)
+        if result["import_time"] > limit:
+            regressions.append(
+                f"import time {result['import_time'] * 1000:.1f} ms > {limit * 1000:.1f} ms "
+                f"(baseline {reference * 1000:.1f} ms + {args.tolerance:.0%})"
+            )
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
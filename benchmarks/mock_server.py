@@ -0,0 +1,246 @@
+# File: mock_server.py
+#
+# Copyright (c) Lansweeper, 2022-2026
+#
+# This unpublished material is proprietary to Lansweeper.
+# All rights reserved. The methods and
+# techniques described herein are considered trade secrets
+# and/or confidential. Reproduction or distribution, in whole
+# or in part, is forbidden except by express written permission
+# of Lansweeper.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+#
+
+"""
+Local stand-in for the Lansweeper GraphQL API, serving synthetic sites and assets.
+
+The server answers the 'authorizedSites' query and the 'assetResources' query of one or several aliased sites, with the
+EQUAL, REGEXP and GREATER_THAN filter conditions and the cursor pagination. The asset 'k' of the site 'i' has the IP
+address 10.<i>.<k / 256>.<k % 256> and the MAC address 00:0C:29:<i>:<k / 256>:<k % 256>. Every response is delayed by
+the configured latency and every Nth asset query can be throttled with a 429 status code.
+
+The port the server listens on is printed on the first line of the standard output. The request counters are served on
+GET /stats.
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+SITE_SELECTION = re.compile(r"(?:(\w+):\s*)?site\(id:\s*\$(\w+)\)")
+
+
+def build_site(index, asset_count):
+    """
+    Build the synthetic assets of a site along with their indexes by IP and MAC address.
+
+    :param index: index of the site
+    :param asset_count: number of assets of the site
+    :return: tuple of the list of assets and the dictionary of the asset positions by indexed value
+    """
+    assets = []
+    positions = {}
+    for k in range(asset_count):
+        ip = f"10.{index % 256}.{k // 256 % 256}.{k % 256}"
+        mac = f"00:0C:29:{index % 256:02X}:{k // 256 % 256:02X}:{k % 256:02X}"
+        assets.append(
+            {
+                "_id": f"site-{index}-asset-{k}",
+                "assetBasicInfo": {
+                    "name": f"HOST-{index}-{k}",
+                    "domain": "LANSWEEPER",
+                    "ipAddress": ip,
+                    "mac": mac,
+                    "type": "Windows",
+                    "firstSeen": "2024-01-01T00:00:00.000Z",
+                    "lastSeen": f"2024-02-{1 + k % 28:02d}T{k % 24:02d}:00:00.000Z",
+                },
+                "assetCustom": {"manufacturer": "VMware, Inc.", "model": "VMware Virtual Platform"},
+                "url": f"https://app.lansweeper.com/site-{index}/asset/{k}",
+            }
+        )
+        positions.setdefault(ip, []).append(k)
+        positions.setdefault(mac, []).append(k)
+
+    return assets, positions
+
+
+class MockLansweeper:
+    """Represent the synthetic data and the behavior of the stand-in server."""
+
+    def __init__(self, sites, assets, latency, max_page_size, throttle_every, retry_after, site_name=None):
+        """
+        Build the synthetic sites.
+
+        :param sites: number of sites
+        :param assets: number of assets per site
+        :param latency: delay of every response in seconds
+        :param max_page_size: maximum number of assets returned per page
+        :param throttle_every: throttle every Nth asset query, 0 to never throttle
+        :param retry_after: value of the 'Retry-After' header of the throttled responses
+        :param site_name: name shared by all the sites, a distinct name per site by default
+        """
+        self.site_name = site_name
+        self.sites = {f"site-{index}": build_site(index, assets) for index in range(sites)}
+        self.latency = latency
+        self.max_page_size = max_page_size
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.stats = {"requests": 0, "site_requests": 0, "asset_requests": 0, "throttled": 0}
+        self._lock = threading.Lock()
+
+    def match(self, site_id, conditions):
+        """
+        Get the assets of a site matching any of the filter conditions.
+
+        :param site_id: Site ID
+        :param conditions: list of filter conditions
+        :return: list of matching assets
+        """
+        assets, positions = self.sites.get(site_id, ([], {}))
+        if not conditions:
+            return assets
+
+        matched = set()
+        for condition in conditions:
+            operator = condition.get("operator", "EQUAL")
+            section, _, field = condition["path"].partition(".")
+            value = condition.get("value")
+            if operator == "EQUAL" and field in ("ipAddress", "mac"):
+                matched.update(positions.get(value, []))
+                continue
+            for position, asset in enumerate(assets):
+                actual = str((asset.get(section) or {}).get(field) or "")
+                if (
+                    (operator == "EQUAL" and actual == value)
+                    or (operator == "REGEXP" and re.search(value, actual))
+                    or (operator == "GREATER_THAN" and actual > value)
+                ):
+                    matched.add(position)
+
+        return [assets[position] for position in sorted(matched)]
+
+    def asset_resources(self, site_id, variables):
+        """
+        Get a page of the asset resources of a site.
+
+        :param site_id: Site ID
+        :param variables: variables of the query
+        :return: dictionary of the asset resources
+        """
+        pagination = variables.get("pagination") or {}
+        items = self.match(site_id, (variables.get("filters") or {}).get("conditions", []))
+        limit = min(pagination.get("limit") or self.max_page_size, self.max_page_size)
+        start = int(pagination.get("cursor") or 0) if pagination.get("page") == "NEXT" else 0
+        end = start + limit
+        return {
+            "total": len(items),
+            "pagination": {
+                "limit": limit,
+                "current": str(start),
+                "next": str(end) if end < len(items) else None,
+                "page": pagination.get("page"),
+            },
+            "items": items[start:end],
+        }
+
+    def handle(self, body):
+        """
+        Answer a GraphQL request.
+
+        :param body: decoded request body
+        :return: tuple of the status code, the headers and the response body
+        """
+        query = body.get("query", "")
+        variables = body.get("variables") or {}
+        with self._lock:
+            self.stats["requests"] += 1
+            if "authorizedSites" in query:
+                self.stats["site_requests"] += 1
+            else:
+                self.stats["asset_requests"] += 1
+                if self.throttle_every and self.stats["asset_requests"] % self.throttle_every == 0:
+                    self.stats["throttled"] += 1
+                    return 429, {"Retry-After": str(self.retry_after)}, {"errors": [{"message": "Too many requests"}]}
+
+        time.sleep(self.latency)
+        if "authorizedSites" in query:
+            sites = [{"id": site_id, "name": self.site_name or f"Site {site_id}"} for site_id in self.sites]
+            return 200, {}, {"data": {"authorizedSites": {"sites": sites}}}
+
+        data = {}
+        for match in SITE_SELECTION.finditer(query):
+            alias = match.group(1) or "site"
+            data[alias] = {"assetResources": self.asset_resources(variables.get(match.group(2)), variables)}
+
+        return 200, {}, {"data": data}
+
+
+def make_handler(mock):
+    """
+    Create the request handler class of the server.
+
+    :param mock: MockLansweeper object
+    :return: request handler class
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status, headers, payload):
+            content = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(content)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(content)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            self.send_json(*mock.handle(body))
+
+        def do_GET(self):
+            self.send_json(200, {}, mock.stats)
+
+    return Handler
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argparser.add_argument("--port", type=int, default=0, help="port to listen on, a free port by default")
+    argparser.add_argument("--sites", type=int, default=1, help="number of sites")
+    argparser.add_argument("--assets", type=int, default=1000, help="number of assets per site")
+    argparser.add_argument("--latency", type=float, default=0.02, help="delay of every response in seconds")
+    argparser.add_argument("--max-page-size", type=int, default=500, help="maximum number of assets returned per page")
+    argparser.add_argument("--throttle-every", type=int, default=0, help="throttle every Nth asset query with a 429 status code")
+    argparser.add_argument("--retry-after", type=float, default=0, help="value of the 'Retry-After' header of the throttled responses")
+    argparser.add_argument("--site-name", help="name shared by all the sites, a distinct name per site by default")
+    args = argparser.parse_args()
+
+    mock = MockLansweeper(args.sites, args.assets, args.latency, args.max_page_size, args.throttle_every, args.retry_after, args.site_name)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(mock))
+    print(server.server_address[1], flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
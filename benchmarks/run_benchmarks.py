@@ -0,0 +1,289 @@
+# File: run_benchmarks.py
+#
+# Copyright (c) Lansweeper, 2022-2026
+#
+# This unpublished material is proprietary to Lansweeper.
+# All rights reserved. The methods and
+# techniques described herein are considered trade secrets
+# and/or confidential. Reproduction or distribution, in whole
+# or in part, is forbidden except by express written permission
+# of Lansweeper.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+#
+
+"""
+Benchmark the hunt actions of the connector against the local stand-in for the Lansweeper GraphQL API.
+
+Every scenario starts mock_server.py with its own data set, latency, page size and throttling, then runs the action
+through LansweeperConnector._handle_action several times. The median latency, the peak memory allocated by the
+action and the number of requests received by the server are reported per scenario.
+
+When a baseline is given, the run fails if a scenario got slower or used more memory than the baseline by more than the
+tolerance, or if it sent more requests than the baseline. A scenario giving the expected number of assets fails if the
+action returns another number of assets.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import urllib.request
+
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+import lansweeper_connector
+from lansweeper_connector import LansweeperConnector
+
+
+# Configuration shared by all the scenarios, the caches are disabled so that every run reaches the server
+BASE_CONFIG = {
+    "identity_code": "benchmark",
+    "cache_ttl": 0,
+    "snapshot_ttl": 0,
+    "requests_per_second": 0,
+    "max_retries": 3,
+}
+
+IPS = ",".join(f"10.{site}.0.{k}" for site in range(10) for k in range(1, 21))
+MACS = ",".join(f"00:0C:29:{site:02X}:00:{k:02X}" for site in range(10) for k in range(1, 21))
+
+SCENARIOS = [
+    {
+        "name": "hunt_ip_1_site_1_ip",
+        "server": {"sites": 1},
+        "action": "hunt_ip",
+        "parameters": {"site_id": "site-0", "ip": "10.0.0.1"},
+    },
+    {
+        "name": "hunt_ip_10_sites_1_ip",
+        "server": {"sites": 10},
+        "action": "hunt_ip",
+        "parameters": {"site_id": ",".join(f"site-{index}" for index in range(10)), "ip": "10.0.0.1"},
+    },
+    {
+        "name": "hunt_ip_10_sites_200_ips",
+        "server": {"sites": 10},
+        "action": "hunt_ip",
+        "parameters": {"site_id": ",".join(f"site-{index}" for index in range(10)), "ip": IPS, "max_results_per_site": 1000},
+    },
+    {
+        "name": "hunt_ip_10_sites_200_ips_multi_site_query",
+        "server": {"sites": 10},
+        "action": "hunt_ip",
+        "parameters": {"site_id": ",".join(f"site-{index}" for index in range(10)), "ip": IPS, "max_results_per_site": 1000},
+        "config": {"multi_site_query": True},
+    },
+    {
+        "name": "hunt_mac_10_sites_200_macs",
+        "server": {"sites": 10},
+        "action": "hunt_mac",
+        "parameters": {"site_id": ",".join(f"site-{index}" for index in range(10)), "mac": MACS, "max_results_per_site": 1000},
+    },
+    {
+        "name": "hunt_ip_10_sites_20_parameter_sets",
+        "server": {"sites": 10},
+        "action": "hunt_ip",
+        "parameters": [{"site_id": ",".join(f"site-{index}" for index in range(10)), "ip": f"10.{k % 10}.0.{k}"} for k in range(1, 21)],
+    },
+    {
+        "name": "hunt_ip_range_deep_pagination",
+        "server": {"sites": 1, "assets": 5000, "max_page_size": 100},
+        "action": "hunt_ip",
+        "parameters": {"site_id": "site-0", "ip": "10.0.0.0/20", "max_results_per_site": 5000},
+        "config": {"page_size": 100},
+    },
+    {
+        # The sites sharing a name are limited separately, so every site returns its own maximum number of assets
+        "name": "hunt_ip_2_sites_same_name",
+        "server": {"sites": 2, "site_name": "Site"},
+        "action": "hunt_ip",
+        "parameters": {"ip": "10.0.0.1,10.1.0.1,10.0.0.0/28,10.1.0.0/28", "max_results_per_site": 5},
+        "expected_items": 10,
+    },
+    {
+        "name": "hunt_ip_throttled",
+        "server": {"sites": 5, "throttle_every": 3},
+        "action": "hunt_ip",
+        "parameters": {"site_id": ",".join(f"site-{index}" for index in range(5)), "ip": IPS, "max_results_per_site": 1000},
+    },
+]
+
+
+class MockServer:
+    """Run mock_server.py in a subprocess for the duration of a scenario."""
+
+    def __init__(self, options):
+        """
+        :param options: dictionary of the server options, see mock_server.py
+        """
+        self._options = options
+        self._process = None
+        self.url = None
+
+    def __enter__(self):
+        command = [sys.executable, os.path.join(BENCHMARKS_DIR, "mock_server.py")]
+        for option, value in self._options.items():
+            command += [f"--{option.replace('_', '-')}", str(value)]
+
+        self._process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        self.url = f"http://127.0.0.1:{self._process.stdout.readline().strip()}"
+        return self
+
+    def __exit__(self, *exc_info):
+        self._process.terminate()
+        self._process.wait()
+
+    def get_stats(self):
+        """
+        Get the request counters of the server.
+
+        :return: dictionary of the counters
+        """
+        with urllib.request.urlopen(f"{self.url}/stats") as response:
+            return json.load(response)
+
+
+def run_action(asset_id, action, parameters, config):
+    """
+    Run an action of the connector.
+
+    :param asset_id: asset ID, which scopes the state of the connector
+    :param action: action identifier
+    :param parameters: action parameters, or list of the parameter sets of the action run
+    :param config: asset configuration
+    :return: tuple of the duration in seconds, the peak memory in bytes and the list of the action results
+    """
+    connector = LansweeperConnector()
+    in_json = {
+        "action": action,
+        "identifier": action,
+        "asset_id": asset_id,
+        "config": config,
+        "parameters": parameters if isinstance(parameters, list) else [parameters],
+    }
+
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    connector._handle_action(json.dumps(in_json), None)
+    duration = time.perf_counter() - started_at
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return duration, peak, connector.get_action_results()
+
+
+def run_scenario(scenario, repeat):
+    """
+    Run a scenario several times against its own server.
+
+    :param scenario: dictionary of the scenario
+    :param repeat: number of runs
+    :return: dictionary of the measures
+    """
+    # Every scenario has its own asset, so that the authorized sites cached by a scenario are not reused by another one
+    asset_id = f"lansweeper_benchmark_{scenario['name']}"
+    config = {**BASE_CONFIG, **scenario.get("config", {})}
+    durations = []
+    peaks = []
+    with MockServer(scenario["server"]) as server:
+        lansweeper_connector.LANSWEEPER_QUERY_ENDPOINT = f"{server.url}/graphql"
+        # The first run also fetches the authorized sites, it warms up the connector and is not measured
+        run_action(asset_id, scenario["action"], scenario["parameters"], config)
+        before = server.get_stats()
+        for _ in range(repeat):
+            duration, peak, action_results = run_action(asset_id, scenario["action"], scenario["parameters"], config)
+            for action_result in action_results:
+                if not action_result.get_status():
+                    raise RuntimeError(f"{scenario['name']}: {action_result.get_message()}")
+            durations.append(duration)
+            peaks.append(peak)
+        after = server.get_stats()
+
+    items = sum(len(action_result.get_data()) for action_result in action_results)
+    if "expected_items" in scenario and items != scenario["expected_items"]:
+        raise RuntimeError(f"{scenario['name']}: {items} assets returned instead of {scenario['expected_items']}")
+
+    return {
+        "latency": statistics.median(durations),
+        "peak_memory": max(peaks),
+        "requests": (after["requests"] - before["requests"]) / repeat,
+        "throttled": (after["throttled"] - before["throttled"]) / repeat,
+        "items": items,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare the results of the run with the baseline.
+
+    :param results: dictionary of the measures by scenario name
+    :param baseline: dictionary of the baseline measures by scenario name
+    :param tolerance: allowed relative increase of the latency and of the peak memory
+    :return: list of the regressions
+    """
+    regressions = []
+    for name, measures in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        for key in ("latency", "peak_memory"):
+            limit = reference[key] * (1 + tolerance)
+            if measures[key] > limit:
+                regressions.append(f"{name}: {key} {measures[key]:.4g} > {limit:.4g} (baseline {reference[key]:.4g} + {tolerance:.0%})")
+        if measures["requests"] > reference["requests"]:
+            regressions.append(f"{name}: requests {measures['requests']:g} > {reference['requests']:g}")
+
+    return regressions
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argparser.add_argument("-k", "--scenario", action="append", help="run only the scenarios whose name contains this value")
+    argparser.add_argument("--repeat", type=int, default=5, help="number of measured runs per scenario")
+    argparser.add_argument("--output", help="write the results to this JSON file, e.g. to be used as a baseline")
+    argparser.add_argument("--baseline", help="compare the results with this JSON file and fail on regressions")
+    argparser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative increase of the latency and of the peak memory")
+    args = argparser.parse_args()
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.scenario or any(value in scenario["name"] for value in args.scenario)]
+
+    results = {}
+    print(f"{'scenario':<45} {'latency (s)':>12} {'peak (KiB)':>12} {'requests':>10} {'throttled':>10} {'items':>8}")
+    for scenario in scenarios:
+        measures = results[scenario["name"]] = run_scenario(scenario, args.repeat)
+        print(
+            f"{scenario['name']:<45} {measures['latency']:>12.3f} {measures['peak_memory'] / 1024:>12.0f} "
+            f"{measures['requests']:>10g} {measures['throttled']:>10g} {measures['items']:>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -21,19 +21,39 @@
 # and limitations under the License.
 #
 
+import csv
 import ipaddress
+import itertools
 import json
+import os
 import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 
-import macaddress
 import phantom.app as phantom
 import requests
-from bs4 import BeautifulSoup
 from phantom.action_result import ActionResult
 from phantom.base_connector import BaseConnector
+from requests.adapters import HTTPAdapter
 
 # Local Imports
 from lansweeper_consts import *
+from lansweeper_ip_ranges import IPRangeIndex, get_prefix_patterns, iter_range_addresses, parse_ip_range
+from lansweeper_performance import PerformanceRecorder
+from lansweeper_query import AUTHORIZED_SITES_QUERY, build_any_of_filters, build_asset_variables, get_asset_query
+from lansweeper_snapshot import AssetSnapshot
+from lansweeper_throttle import AIMDConcurrencyLimiter, TokenBucket, get_backoff_delay
+
+
+try:
+    # orjson is an optional, faster backend for decoding the large pages of assets
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 
 class RetVal(tuple):
@@ -44,11 +64,25 @@ class RetVal(tuple):
         return tuple.__new__(RetVal, (val1, val2))
 
 
-class MACAllowsTrailingDelimiters(macaddress.MAC):
-    """Represent a subclass to define additional valid MAC formats."""
+@cache
+def get_mac_address_class():
+    """
+    Get the MAC address class accepting additional formats.
+
+    The class is created on first use, so that macaddress is imported only by the actions handling MAC addresses and not
+    by every process spawned for an action.
+
+    :return: MACAllowsTrailingDelimiters class
+    """
+    import macaddress
+
+    class MACAllowsTrailingDelimiters(macaddress.MAC):
+        """Represent a subclass to define additional valid MAC formats."""
+
+        other_valid_formats_allowed = ("xx xx xx xx xx xx", "xxx:xxx:xxx:xxx")
+        formats = macaddress.MAC.formats + other_valid_formats_allowed
 
-    other_valid_formats_allowed = ("xx xx xx xx xx xx", "xxx:xxx:xxx:xxx")
-    formats = macaddress.MAC.formats + other_valid_formats_allowed
+    return MACAllowsTrailingDelimiters
 
 
 class LansweeperConnector(BaseConnector):
@@ -67,6 +101,27 @@ class LansweeperConnector(BaseConnector):
         self._authorized_sites = {}
         self._identity_code = None
         self._headers = {}
+        self._session = None
+        self._max_concurrent_sites = LANSWEEPER_DEFAULT_MAX_CONCURRENT_SITES
+        self._cache_ttl = LANSWEEPER_DEFAULT_CACHE_TTL
+        self._cache_max_entries = LANSWEEPER_DEFAULT_CACHE_MAX_ENTRIES
+        self._max_addresses_per_query = LANSWEEPER_DEFAULT_MAX_ADDRESSES_PER_QUERY
+        self._multi_site_query = False
+        self._page_size = LANSWEEPER_DEFAULT_PAGE_LIMIT
+        self._max_retries = LANSWEEPER_DEFAULT_MAX_RETRIES
+        self._rate_limiter = TokenBucket(0)
+        self._concurrency_limiter = AIMDConcurrencyLimiter(LANSWEEPER_DEFAULT_MAX_CONCURRENT_SITES, LANSWEEPER_DEFAULT_MAX_CONCURRENT_SITES)
+        self._debug_capture = LANSWEEPER_DEFAULT_DEBUG_CAPTURE
+        self._authorized_sites_ttl = LANSWEEPER_DEFAULT_AUTH_SITES_TTL
+        self._sites_refresh = None
+        self._state_file_writable = None
+        self._snapshot_ttl = LANSWEEPER_DEFAULT_SNAPSHOT_TTL
+        self._snapshot = None
+        self._max_assets_per_poll = LANSWEEPER_DEFAULT_MAX_ASSETS_PER_POLL
+        self._debug_capture_bytes = LANSWEEPER_DEFAULT_DEBUG_CAPTURE_BYTES
+        self._performance = PerformanceRecorder()
+        self._param_sets = []
+        self._run_assets = None
 
     def _get_error_message_from_exception(self, e):
         """
@@ -130,16 +185,16 @@ class LansweeperConnector(BaseConnector):
 
         return phantom.APP_SUCCESS, parameter
 
-    def _is_ipv4(self, input_ip_address):
+    def _is_ip(self, input_ip_address):
         """
-        Validate given IP address and return True if address is valid IPv4 address.
+        Validate given IP address and return True if address is valid IPv4 or IPv6 address.
 
         :param input_ip_address: IP address
         :return: True/False
         """
         try:
-            # Validate IPv4 Address
-            ipaddress.IPv4Address(input_ip_address)
+            # Validate IPv4 or IPv6 Address
+            ipaddress.ip_address(input_ip_address)
         except Exception:
             return False
         return True
@@ -153,7 +208,7 @@ class LansweeperConnector(BaseConnector):
         """
         try:
             # Validate MAC Address
-            MACAllowsTrailingDelimiters(input_mac_address)
+            get_mac_address_class()(input_mac_address)
         except Exception:
             return False
         return True
@@ -175,6 +230,39 @@ class LansweeperConnector(BaseConnector):
             return action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_INVALID_FIELDS.format(key=key)), None
         return phantom.APP_SUCCESS, fields_list
 
+    def _validate_asset_fields(self, action_result, fields, indicator_type):
+        """
+        Validate the asset fields to be fetched. This method accepts either a preset name or comma separated field names.
+
+        The field holding the searched addresses is always fetched, as it is required to match the assets with the addresses.
+
+        :param action_result: Action result object
+        :param fields: input parameter
+        :param indicator_type: type of the searched addresses (ip/mac)
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, list of asset fields or None in case of failure
+        """
+        preset = LANSWEEPER_ASSET_FIELD_PRESETS.get(fields.strip().lower())
+        if preset:
+            fields_list = list(preset)
+        else:
+            ret_val, fields_list = self._filter_comma_seperated_fields(action_result, fields, "fields")
+            if phantom.is_fail(ret_val):
+                return action_result.get_status(), None
+
+            invalid_fields = [field for field in fields_list if field not in LANSWEEPER_ASSET_FIELDS]
+            if invalid_fields:
+                message = LANSWEEPER_ERR_INVALID_ASSET_FIELDS.format(
+                    fields=", ".join(invalid_fields), presets=", ".join(LANSWEEPER_ASSET_FIELD_PRESETS)
+                )
+                return action_result.set_status(phantom.APP_ERROR, message), None
+
+        indicator_path = LANSWEEPER_INDICATOR_PATHS[indicator_type]
+        if indicator_path not in fields_list:
+            fields_list.append(indicator_path)
+
+        # Remove duplicates while keeping the order of the fields
+        return phantom.APP_SUCCESS, list(dict.fromkeys(fields_list))
+
     def _process_empty_response(self, response, action_result):
         """
         Process empty response.
@@ -203,6 +291,9 @@ class LansweeperConnector(BaseConnector):
         status_code = response.status_code
 
         try:
+            # Imported on first use, as the HTML responses are only returned by the proxies and the error pages
+            from bs4 import BeautifulSoup
+
             soup = BeautifulSoup(response.text, "html.parser")
             # Remove the script, style, footer and navigation part from the HTML message
             for element in soup(["script", "style", "footer", "nav"]):
@@ -221,20 +312,20 @@ class LansweeperConnector(BaseConnector):
         message = message.replace("{", "{{").replace("}", "}}")
         return RetVal(action_result.set_status(phantom.APP_ERROR, message), None)
 
-    def _process_json_response(self, r, action_result):
+    def _process_json_response(self, r, action_result, resp_json, decode_error=None):
         """
         Process json response.
 
         :param r: response object
         :param action_result: object of Action Result
-        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message)
+        :param resp_json: decoded body of the response, see _parse_response
+        :param decode_error: exception raised while decoding the body of the response, if any
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message), response body. The body of a
+        GraphQL response holding errors is returned along with the failure, as its data may be partial rather than missing
         """
         status_code = r.status_code
-        # Try a json parse
-        try:
-            resp_json = r.json()
-        except Exception as e:
-            error_msg = self._get_error_message_from_exception(e)
+        if decode_error is not None:
+            error_msg = self._get_error_message_from_exception(decode_error)
             return RetVal(
                 action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_UNABLE_TO_PARSE_JSON_RESPONSE.format(error=error_msg)),
                 None,
@@ -246,7 +337,7 @@ class LansweeperConnector(BaseConnector):
                 error_msg = ". ".join([error.get("message") for error in errors if error.get("message")])
                 if error_msg:
                     message = f"Error from server. Status Code: {status_code}. Error Details: {error_msg}"
-                    return RetVal(action_result.set_status(phantom.APP_ERROR, message), None)
+                    return RetVal(action_result.set_status(phantom.APP_ERROR, message), resp_json)
             except Exception:
                 pass
 
@@ -272,23 +363,73 @@ class LansweeperConnector(BaseConnector):
         :param action_result: object of Action Result
         :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message)
         """
-        # store the r_text in debug data, it will get dumped in the logs if the action fails
-        if hasattr(action_result, "add_debug_data"):
-            action_result.add_debug_data({"r_status_code": r.status_code})
-            action_result.add_debug_data({"r_text": r.text})
-            action_result.add_debug_data({"r_headers": r.headers})
+        with self._performance.timer("decode_time"):
+            ret_val, response = self._parse_response(r, action_result)
+        self._add_response_debug_data(r, action_result, phantom.is_fail(ret_val))
+
+        return RetVal(ret_val, response)
+
+    def _add_response_debug_data(self, r, action_result, failed):
+        """
+        Store the response in the debug data as per the 'debug_capture' policy, it will get dumped in the logs if the action fails.
+
+        The raw text of the successful pages is otherwise kept in memory for the whole action alongside the decoded items.
+
+        :param r: response object
+        :param action_result: object of Action Result
+        :param failed: whether the response was processed as an error
+        """
+        if not hasattr(action_result, "add_debug_data") or self._debug_capture == LANSWEEPER_DEBUG_CAPTURE_OFF:
+            return
+
+        if self._debug_capture == LANSWEEPER_DEBUG_CAPTURE_ERRORS_ONLY:
+            if not failed:
+                return
+            r_text = r.text
+        else:
+            r_text = r.content[: self._debug_capture_bytes].decode(r.encoding or "utf-8", errors="replace")
+            if len(r.content) > self._debug_capture_bytes:
+                r_text = f"{r_text}... [truncated {len(r.content) - self._debug_capture_bytes} byte(s)]"
+
+        action_result.add_debug_data({"r_status_code": r.status_code})
+        action_result.add_debug_data({"r_text": r_text})
+        action_result.add_debug_data({"r_headers": r.headers})
+
+    def _parse_response(self, r, action_result):
+        """
+        Parse API response as per its content type.
+
+        :param r: response object
+        :param action_result: object of Action Result
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message)
+        """
+        content_type = r.headers.get("Content-Type", "")
+
+        # Decode the body of a json response once, it is passed along to the processing of the json responses
+        resp_json = None
+        decode_error = None
+        if "json" in content_type:
+            try:
+                resp_json = json_loads(r.content)
+            except ValueError as e:
+                decode_error = e
+
+        # Fast path for the successful GraphQL responses holding the data without any errors, the other responses
+        # go through the processing by content type below
+        if 200 <= r.status_code < 399 and isinstance(resp_json, dict) and "data" in resp_json and not resp_json.get("errors"):
+            return RetVal(phantom.APP_SUCCESS, resp_json)
 
         # Process each 'Content-Type' of response separately
 
         # Process a json response
-        if "json" in r.headers.get("Content-Type", ""):
-            return self._process_json_response(r, action_result)
+        if "json" in content_type:
+            return self._process_json_response(r, action_result, resp_json, decode_error)
 
         # Process an HTML response, Do this no matter what the api talks.
         # There is a high chance of a PROXY in between phantom and the rest of
         # world, in case of errors, PROXY's return HTML, this function parses
         # the error and adds it to the action_result.
-        if "html" in r.headers.get("Content-Type", ""):
+        if "html" in content_type:
             return self._process_html_response(r, action_result)
 
         # it's not content-type that is to be parsed, handle an empty response
@@ -301,10 +442,31 @@ class LansweeperConnector(BaseConnector):
 
         return RetVal(action_result.set_status(phantom.APP_ERROR, message), None)
 
+    def _is_state_file_writable(self):
+        """
+        Check whether the state file can be written, the permissions are checked only once per run.
+
+        If the corresponding state file does not have the correct owner, owner group or permissions, the data is not
+        saved in the state file.
+
+        :return: bool
+        """
+        if self._state_file_writable is None:
+            state_dir = self.get_state_dir()
+            state_file = os.path.join(state_dir, f"{self.get_asset_id()}_state.json")
+            if os.path.exists(state_file):
+                self._state_file_writable = os.access(state_file, os.R_OK | os.W_OK)
+            else:
+                self._state_file_writable = os.access(state_dir, os.W_OK)
+
+        return self._state_file_writable
+
     def _save_authorized_sites(self, action_result):
         """
         Save authorized sites.
 
+        The authorized sites index is persisted with the rest of the state at the end of the run.
+
         :param action_result: Object of ActionResult class
         :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR)
         """
@@ -319,30 +481,145 @@ class LansweeperConnector(BaseConnector):
         except Exception:
             return action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_PROCESSING_AUTH_SITE_RESPONSE)
 
+        if not self._is_state_file_writable():
+            error_msg = LANSWEEPER_ERR_INVALID_PERMISSION_STATE_FILE.format(data="authorized sites")
+            return action_result.set_status(phantom.APP_ERROR, error_msg)
+
+        self._authorized_sites = authorized_sites_dict
         self._state[LANSWEEPER_AUTH_SITES_STRING] = authorized_sites_dict
+        self._state[LANSWEEPER_AUTH_SITES_TIMESTAMP_STRING] = time.time()
 
-        # Save state
-        self.save_state(self._state)
+        return action_result.set_status(phantom.APP_SUCCESS)
 
-        self._state = self.load_state()
+    def _fetch_authorized_sites(self, action_result):
+        """
+        Fetch the authorized sites without saving them. This method may be executed on a background thread.
 
-        # If the corresponding state file does not have the correct owner, owner group or permissions,
-        # the authorized sites is not saved in the state file. So, we need to verify the sites list from
-        # action result and site list from the saved state file are same or not.
+        :param action_result: Object of ActionResult class, the sites are added to its data
+        :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR)
+        """
+        ret_val, response = self._make_rest_call(
+            action_result=action_result, url=LANSWEEPER_QUERY_ENDPOINT, json={"query": AUTHORIZED_SITES_QUERY}, method="post"
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
 
-        if authorized_sites_dict != self._state.get(LANSWEEPER_AUTH_SITES_STRING, {}):
-            error_msg = LANSWEEPER_ERR_INVALID_PERMISSION_STATE_FILE.format(data="authorized sites")
-            return action_result.set_status(phantom.APP_ERROR, error_msg)
+        for site in response.get("data", {}).get("authorizedSites", {}).get("sites", []):
+            action_result.add_data(site)
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
+    def _refresh_authorized_sites(self, action_result):
+        """
+        Fetch the authorized sites and save them in the authorized sites index.
+
+        :param action_result: Object of ActionResult class, the sites are added to its data
+        :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR)
+        """
+        if phantom.is_fail(self._fetch_authorized_sites(action_result)):
+            return action_result.get_status()
+
+        return self._save_authorized_sites(action_result)
+
+    def _refresh_authorized_sites_in_background(self):
+        """
+        Fetch the authorized sites in a background thread, while the current index is being used.
+
+        The thread only fetches the sites. They are saved in the index and in the state by the main thread once it waits
+        for the refresh, so that the state is never modified while the main thread uses or saves it.
+        """
+        if self._sites_refresh:
+            return
+
+        sites_action_result = ActionResult()
+        executor = ThreadPoolExecutor(max_workers=1)
+        self._sites_refresh = (executor.submit(self._fetch_authorized_sites, sites_action_result), sites_action_result)
+        executor.shutdown(wait=False)
+
+    def _wait_for_authorized_sites_refresh(self):
+        """Wait for the background refresh of the authorized sites to complete, if any, and save the fetched sites."""
+        if not self._sites_refresh:
+            return
+
+        (future, sites_action_result), self._sites_refresh = self._sites_refresh, None
+        try:
+            ret_val = future.result()
+        except Exception as e:
+            ret_val = sites_action_result.set_status(phantom.APP_ERROR, self._get_error_message_from_exception(e))
+
+        if phantom.is_fail(ret_val) or phantom.is_fail(self._save_authorized_sites(sites_action_result)):
+            self.debug_print(f"Unable to refresh the authorized sites in the background. {sites_action_result.get_message()}")
+
+    def _load_authorized_sites(self, action_result, site_ids=None):
+        """
+        Make sure the authorized sites index is available, refreshing it lazily.
+
+        A missing index is fetched right away. A stale index is still used, while it is refreshed in the background,
+        unless one of the requested sites is not in it.
+
+        :param action_result: Object of ActionResult class
+        :param site_ids: list of the requested Site IDs, None for all the sites
+        :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR)
+        """
+        if self._authorized_sites:
+            age = time.time() - self._state.get(LANSWEEPER_AUTH_SITES_TIMESTAMP_STRING, 0)
+            if not self._authorized_sites_ttl or age < self._authorized_sites_ttl:
+                return phantom.APP_SUCCESS
+
+            if all(site_id in self._authorized_sites for site_id in site_ids or []):
+                self.debug_print(f"Refreshing the authorized sites cached {int(age)} second(s) ago")
+                self._refresh_authorized_sites_in_background()
+                return phantom.APP_SUCCESS
+
+        # Use the result of the ongoing background refresh, if any, before fetching the sites again
+        self._wait_for_authorized_sites_refresh()
+        if self._authorized_sites and all(site_id in self._authorized_sites for site_id in site_ids or []):
+            return phantom.APP_SUCCESS
+
+        self.save_progress("Retrieving authorized sites...")
+        sites_action_result = ActionResult()
+        if phantom.is_fail(self._refresh_authorized_sites(sites_action_result)):
+            return action_result.set_status(phantom.APP_ERROR, sites_action_result.get_message())
+
+        return phantom.APP_SUCCESS
+
+    def _send_request(self, request_func, url, **kwargs):
+        """
+        Send a request within the adaptive limit of the API calls in flight.
+
+        The limit is widened while the calls succeed with a stable latency and cut when a call is throttled or times out,
+        or when the latency rises, so that the concurrency follows what the server can currently serve.
+
+        :param request_func: method of the session sending the request
+        :param url: URL of the resource
+        :param kwargs: arguments of the request
+        :return: response object
+        """
+        with self._performance.timer("wait_time"):
+            token = self._concurrency_limiter.acquire()
+
+        started_at = time.perf_counter()
+        latency = None
+        congested = False
+        try:
+            r = request_func(url, **kwargs)
+            latency = time.perf_counter() - started_at
+            congested = r.status_code in LANSWEEPER_CONGESTION_STATUS_CODES
+            return r
+        except requests.exceptions.Timeout:
+            congested = True
+            raise
+        finally:
+            self._performance.record(request_time=time.perf_counter() - started_at)
+            self._concurrency_limiter.release(token, latency, congested)
+
     def _make_rest_call(self, url, action_result, headers=None, params=None, data=None, json=None, method="get", verify=True):
         """
         Make the REST call to the app.
 
         :param url: URL of the resource
         :param action_result: object of ActionResult class
-        :param headers: request headers
+        :param headers: request headers to be sent in addition to the default headers of the session
         :param params: request parameters
         :param data: request body
         :param json: JSON object
@@ -350,32 +627,67 @@ class LansweeperConnector(BaseConnector):
         :param verify: Verify server certificate
         :return: status phantom.APP_ERROR/phantom.APP_SUCCESS(along with appropriate message),
         response obtained by making an API call
+
+        The calls are paced by the client-side rate limiter. The calls throttled by the server, failed with a transient
+        server error or failed to connect are retried up to 'max_retries' times with a jittered exponential backoff,
+        honouring the 'Retry-After' header of the server in full. The call fails right away if the server asks to retry
+        after more than LANSWEEPER_MAX_RETRY_AFTER_DELAY seconds. The calls in flight are limited by the adaptive concurrency limit,
+        see _send_request. The attempts, the bytes received and the time spent waiting for the
+        rate limiter or the backoff, sending the requests and receiving the responses are recorded for the current site.
         """
-        if not headers:
-            headers = self._headers
         resp_json = None
 
         try:
-            request_func = getattr(requests, method)
+            request_func = getattr(self._session, method)
         except AttributeError:
             return RetVal(action_result.set_status(phantom.APP_ERROR, f"Invalid method: {method}"), resp_json)
 
-        try:
-            r = request_func(url, verify=verify, data=data, json=json, headers=headers, params=params, timeout=60)
-        except requests.exceptions.InvalidURL as e:
-            self.debug_print(self._get_error_message_from_exception(e))
-            return RetVal(action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_INVALID_URL.format(url=url)), resp_json)
-        except requests.exceptions.InvalidSchema as e:
-            self.debug_print(self._get_error_message_from_exception(e))
-            return RetVal(action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_INVALID_SCHEMA.format(url=url)), resp_json)
-        except Exception as e:
-            error_msg = self._get_error_message_from_exception(e)
-            return RetVal(
-                action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_CONNECTING_TO_SERVER.format(error=error_msg)),
-                resp_json,
-            )
+        attempt = 0
+        while True:
+            self._performance.record(requests=1, retries=int(attempt > 0), wait_time=self._rate_limiter.acquire())
+            retry_after = None
+            try:
+                r = self._send_request(request_func, url, verify=verify, data=data, json=json, headers=headers, params=params, timeout=60)
+            except requests.exceptions.InvalidURL as e:
+                self.debug_print(self._get_error_message_from_exception(e))
+                return RetVal(action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_INVALID_URL.format(url=url)), resp_json)
+            except requests.exceptions.InvalidSchema as e:
+                self.debug_print(self._get_error_message_from_exception(e))
+                return RetVal(action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_INVALID_SCHEMA.format(url=url)), resp_json)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error_msg = self._get_error_message_from_exception(e)
+                if attempt >= self._max_retries:
+                    return RetVal(
+                        action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_CONNECTING_TO_SERVER.format(error=error_msg)),
+                        resp_json,
+                    )
+                self.debug_print(f"Error connecting to server. {error_msg}")
+            except Exception as e:
+                error_msg = self._get_error_message_from_exception(e)
+                return RetVal(
+                    action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_CONNECTING_TO_SERVER.format(error=error_msg)),
+                    resp_json,
+                )
+            else:
+                # The elapsed time of the response covers the connection setup and the server time, until the headers are received
+                self._performance.record(bytes_received=len(r.content), response_time=r.elapsed.total_seconds())
+                if r.status_code not in LANSWEEPER_RETRY_STATUS_CODES or attempt >= self._max_retries:
+                    return self._process_response(r, action_result)
+                retry_after = r.headers.get("Retry-After")
+                self.debug_print(f"Server responded with status code {r.status_code}")
+
+            delay = get_backoff_delay(attempt, LANSWEEPER_BACKOFF_BASE_DELAY, LANSWEEPER_BACKOFF_MAX_DELAY, retry_after)
+            # Retrying before the time requested by the server would only be throttled again
+            if retry_after and delay > LANSWEEPER_MAX_RETRY_AFTER_DELAY:
+                message = LANSWEEPER_ERR_RETRY_AFTER_TOO_LONG.format(
+                    status_code=r.status_code, delay=delay, limit=LANSWEEPER_MAX_RETRY_AFTER_DELAY
+                )
+                return RetVal(action_result.set_status(phantom.APP_ERROR, message), resp_json)
 
-        return self._process_response(r, action_result)
+            attempt += 1
+            self.debug_print(f"Retrying the API call in {delay:.2f} second(s). Attempt {attempt} of {self._max_retries}")
+            self._performance.record(wait_time=delay)
+            time.sleep(delay)
 
     def _handle_test_connectivity(self, param):
         """
@@ -407,33 +719,15 @@ class LansweeperConnector(BaseConnector):
         if not action_result:
             action_result = self.add_action_result(ActionResult(dict(param)))
 
-        query = """query {
-            authorizedSites {
-                sites {
-                    id
-                    name
-                }
-            }
-        }"""
-
-        ret_val, response = self._make_rest_call(
-            action_result=action_result, url=LANSWEEPER_QUERY_ENDPOINT, json={"query": query}, method="post"
-        )
-        if phantom.is_fail(ret_val):
-            self._state.pop(LANSWEEPER_AUTH_SITES_STRING, None)
-            return action_result.get_status()
-
-        total = 0
-        for site in response.get("data", {}).get("authorizedSites", {}).get("sites", []):
-            total += 1
-            action_result.add_data(site)
-
-        # Save authorized sites in the state file
-        ret_val = self._save_authorized_sites(action_result)
+        # Fetch the authorized sites and save them in the state file
+        self._wait_for_authorized_sites_refresh()
+        ret_val = self._refresh_authorized_sites(action_result)
         if phantom.is_fail(ret_val):
             self._state.pop(LANSWEEPER_AUTH_SITES_STRING, None)
+            self._state.pop(LANSWEEPER_AUTH_SITES_TIMESTAMP_STRING, None)
             return action_result.get_status()
 
+        total = action_result.get_data_size()
         if total == 0:
             self.save_progress("No authorized sites found")
             return action_result.set_status(phantom.APP_SUCCESS, "No authorized sites found")
@@ -441,57 +735,75 @@ class LansweeperConnector(BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _paginator(self, action_result, endpoint, query, variables, max_results):
+    def _paginator(self, action_result, endpoint, query, variables, max_results, page_state=None):
         """
-        Fetch all the assets using pagination logic.
+        Fetch the assets page by page using pagination logic.
+
+        This is a generator yielding the items of every page as soon as it is received, so that the caller can process
+        them without accumulating the pages. The total number of yielded items never exceeds the maximum results.
 
         :param action_result: object of ActionResult class
         :param endpoint: REST endpoint that needs to appended to the service address
         :param query: query to be passed while calling the API
         :param variables: variables to be considered while calling the API
         :param max_results: maximum number of results to be fetched
-        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, successfully fetched results or None in case of failure
+        :param page_state: optional dictionary updated with the 'cursor' of the page following every yielded page, None once
+        the last page is yielded, so that the pagination can be resumed later
+        :return: generator of status phantom.APP_ERROR/phantom.APP_SUCCESS and the items of a page. In case of failure,
+        the failure status is yielded with an empty list and the pagination stops
         """
-        items_list = list()
-        while True:
-            # Make rest call
-            ret_val, response = self._make_rest_call(
-                action_result=action_result, url=LANSWEEPER_QUERY_ENDPOINT, json={"query": query, "variables": variables}, method="post"
-            )
-            if phantom.is_fail(ret_val):
-                return action_result.get_status(), []
-
-            items = response.get("data", {}).get("site", {}).get("assetResources", {}).get("items", [])
-            # No more items to be fetched. Hence, exit the paginator.
-            if not items:
-                break
-
-            # Extending the items list
-            items_list.extend(items)
-
-            # Max results fetched. Hence, exit the paginator.
-            if len(items_list) >= max_results:
-                return phantom.APP_SUCCESS, items_list[:max_results]
-
-            # Items fetched is less than the default limit, which means there is no more data to be processed
-            if len(items) < LANSWEEPER_DEFAULT_PAGE_LIMIT:
-                break
-
-            # If cursor for next page is not available, exit the paginator.
-            cursor = response.get("data", {}).get("site", {}).get("assetResources", {}).get("pagination", {}).get("next")
-            if not cursor:
-                break
-
-            # Create pagination variables for next call
-            variables = {
-                "pagination": {
-                    "limit": LANSWEEPER_DEFAULT_PAGE_LIMIT,
-                    "cursor": cursor,
-                    "page": "NEXT",
+        remaining = max_results
+        pages = received = wasted = 0
+        try:
+            while remaining > 0:
+                # Make rest call
+                ret_val, response = self._make_rest_call(
+                    action_result=action_result, url=LANSWEEPER_QUERY_ENDPOINT, json={"query": query, "variables": variables}, method="post"
+                )
+                if phantom.is_fail(ret_val):
+                    yield RetVal(action_result.get_status(), [])
+                    return
+
+                asset_resources = response.get("data", {}).get("site", {}).get("assetResources", {})
+                items = asset_resources.get("items", [])
+                # No more items to be fetched. Hence, exit the paginator.
+                if not items:
+                    if page_state is not None:
+                        page_state["cursor"] = None
+                    return
+
+                page_size = len(items)
+                pages += 1
+                received += page_size
+                self._performance.record(pages=1, items=page_size)
+                # Drop the items exceeding the maximum results in place, instead of copying the page
+                del items[remaining:]
+                wasted += page_size - len(items)
+                remaining -= len(items)
+
+                # Items fetched is less than the requested limit, which means there is no more data to be processed
+                cursor = asset_resources.get("pagination", {}).get("next")
+                if page_size < variables["pagination"]["limit"]:
+                    cursor = None
+                if page_state is not None:
+                    page_state["cursor"] = cursor
+                yield RetVal(phantom.APP_SUCCESS, items)
+
+                # If cursor for next page is not available, exit the paginator.
+                if not cursor:
+                    return
+
+                # Create pagination variables for next call, requesting only as many items as are still needed
+                variables = {
+                    **variables,
+                    "pagination": {
+                        "limit": min(self._page_size, remaining),
+                        "cursor": cursor,
+                        "page": "NEXT",
+                    },
                 }
-            }
-
-        return phantom.APP_SUCCESS, items_list
+        finally:
+            self.debug_print(f"Pagination completed. Pages: {pages}, items received: {received}, items discarded: {wasted}")
 
     def _get_sites(self, action_result, site_id):
         """
@@ -504,6 +816,17 @@ class LansweeperConnector(BaseConnector):
         authorized_site_ids = []
         unauthorized_site_ids = []
         sites = {}
+        site_id_list = None
+        if site_id:
+            ret_val, site_id_list = self._filter_comma_seperated_fields(action_result, site_id, "site_id")
+            if phantom.is_fail(ret_val):
+                return action_result.get_status(), sites, authorized_site_ids, unauthorized_site_ids
+
+        # Refresh the authorized sites index lazily, when it is missing or stale
+        ret_val = self._load_authorized_sites(action_result, site_id_list)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), sites, authorized_site_ids, unauthorized_site_ids
+
         if not self._authorized_sites:
             return (
                 action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_NO_AUTHORIZED_SITES_FOUND),
@@ -516,10 +839,6 @@ class LansweeperConnector(BaseConnector):
             sites = self._authorized_sites
             authorized_site_ids.extend(list(self._authorized_sites.keys()))
         else:
-            ret_val, site_id_list = self._filter_comma_seperated_fields(action_result, site_id, "site_id")
-            if phantom.is_fail(ret_val):
-                return action_result.get_status(), sites, authorized_site_ids, unauthorized_site_ids
-
             for site_id in site_id_list:
                 if site_id in self._authorized_sites:
                     sites[site_id] = self._authorized_sites.get(site_id)
@@ -538,263 +857,1427 @@ class LansweeperConnector(BaseConnector):
 
         return phantom.APP_SUCCESS, sites, authorized_site_ids, unauthorized_site_ids
 
-    def _handle_hunt_ip(self, param):
+    def _normalize_indicator(self, value, indicator_type):
         """
-        Fetch asset details based on the IP address.
+        Normalize an IP or MAC address, so that the different spellings of an address are considered equal.
 
-        :param param: dictionary of input parameters
-        :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR)
+        The normalized address is spelled the way Lansweeper stores it, i.e. the dotted form of an IPv4 address, the
+        compressed lower case form of an IPv6 address (e.g. fe80::20c:29ff:fe0a:3d5f) and the upper case, colon separated
+        form of a MAC address (e.g. 00:0C:29:0A:3D:5F), so that it can be queried as is.
+
+        :param value: IP or MAC address
+        :param indicator_type: type of the address (ip/mac)
+        :return: normalized address or None in case of an invalid address
         """
-        action_result = self.add_action_result(ActionResult(dict(param)))
+        try:
+            if indicator_type == "mac":
+                return str(get_mac_address_class()(value)).replace("-", ":")
+            ip = ipaddress.ip_address(value)
+            # An IPv4-mapped IPv6 address is the IPv4 address it embeds
+            return str(getattr(ip, "ipv4_mapped", None) or ip)
+        except Exception:
+            return None
 
-        site_ids = param.get("site_id")
-        # Get sites
-        ret_val, sites, authorized_site_ids, unauthorized_site_ids = self._get_sites(action_result, site_ids)
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
+    def _canonicalize_indicators(self, indicators, indicator_type):
+        """
+        Group the IP or MAC addresses by their normalized address, collapsing the duplicates and the different spellings.
 
-        # Integer validation for 'max_results_per_site' action parameter
-        max_results_per_site = param.get("max_results_per_site", LANSWEEPER_DEFAULT_LIMIT)
-        ret_val, max_results_per_site = self._validate_integer(action_result, max_results_per_site, "max_results_per_site")
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
+        :param indicators: list of IP or MAC addresses
+        :param indicator_type: type of the addresses (ip/mac)
+        :return: dictionary of the unique spellings of the valid addresses by normalized address
+        """
+        indicators_by_key = {}
+        for indicator in indicators:
+            key = self._normalize_indicator(indicator, indicator_type)
+            if key is not None:
+                indicators_by_key.setdefault(key, {})[indicator] = None
 
-        # Convert the comma separated IP(s) into list
-        comma_separated_ips = param["ip"]
-        ret_val, ip_list = self._filter_comma_seperated_fields(action_result, comma_separated_ips, "ip")
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
+        return {key: list(spellings) for key, spellings in indicators_by_key.items()}
 
-        # Validate and filter IP addresses
-        valid_ips = []
-        invalid_ips = []
-        ip_condition_string = ""
-        for ip in ip_list:
-            if self._is_ipv4(ip):
-                valid_ips.append(ip)
-                ip_condition_string += f"""{{
-                    operator: EQUAL,
-                    path: "assetBasicInfo.ipAddress",
-                    value: "{ip}"
-                }},"""
-            else:
-                invalid_ips.append(ip)
-                self.debug_print(LANSWEEPER_ERR_INVALID_IP.format(ip=ip))
+    def _get_indicator_matches(self, items, indicators, indicator_type):
+        """
+        Map every spelling of the given IP or MAC addresses to the IDs of the assets matching its normalized address.
 
-        # If all IP(s) are invalid, exit the code
-        if not ip_condition_string:
-            return action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_INVALID_FIELDS.format(key="ip"))
+        :param items: list of assets
+        :param indicators: list of IP or MAC addresses as provided
+        :param indicator_type: type of the addresses (ip/mac)
+        :return: list of dictionaries of the address, its normalized address and the IDs of the matching assets
+        """
+        indicators_by_key = self._canonicalize_indicators(indicators, indicator_type)
+        assets_by_key = self._group_assets_by_indicator(items, indicators_by_key, indicator_type)
 
-        # Remove the comma from the last condition
-        ip_condition_string = ip_condition_string.rstrip(",")
-        total_items = 0
+        return [
+            {"indicator": indicator, "normalized_indicator": key, "asset_ids": [item.get("_id") for item in assets_by_key[key]]}
+            for key, spellings in indicators_by_key.items()
+            for indicator in spellings
+        ]
 
-        for site_id, site_name in sites.items():
-            # Create query
-            query = f"""query getAssetResources($pagination: AssetsPaginationInputValidated) {{
-                site(id: "{site_id}") {{
-                    assetResources (
-                        assetPagination: $pagination,
-                        fields: [
-                            "assetBasicInfo.name",
-                            "assetBasicInfo.domain",
-                            "assetBasicInfo.userName",
-                            "assetBasicInfo.userDomain",
-                            "assetBasicInfo.fqdn",
-                            "assetBasicInfo.description",
-                            "assetBasicInfo.type",
-                            "assetBasicInfo.mac",
-                            "assetBasicInfo.ipAddress",
-                            "assetBasicInfo.firstSeen"
-                            "assetBasicInfo.lastSeen"
-                            "assetCustom.model",
-                            "assetCustom.serialNumber",
-                            "assetCustom.manufacturer",
-                            "assetCustom.sku",
-                            "url"
-                        ],
-                        filters: {{
-                            conjunction: OR,
-                            conditions: [{ip_condition_string}]
-                        }}
-                    ) {{
-                        total
-                        pagination {{
-                            limit
-                            current
-                            next
-                            page
-                        }}
-                        items
-                    }}
-                }}
-            }}"""
-
-            variables = {"pagination": {"limit": min(max_results_per_site, LANSWEEPER_DEFAULT_PAGE_LIMIT), "page": "FIRST"}}
-
-            # make rest call
-            ret_val, items = self._paginator(
-                action_result=action_result,
-                endpoint=LANSWEEPER_QUERY_ENDPOINT,
-                query=query,
-                variables=variables,
-                max_results=max_results_per_site,
-            )
+    def _group_assets_by_indicator(self, items, keys, indicator_type):
+        """
+        Group the assets by the normalized IP or MAC address they were matched with.
 
-            if phantom.is_fail(ret_val):
-                return action_result.get_status()
+        :param items: list of assets
+        :param keys: list of normalized IP or MAC addresses
+        :param indicator_type: type of the addresses (ip/mac)
+        :return: dictionary of the assets by normalized address
+        """
+        section, field = LANSWEEPER_INDICATOR_PATHS[indicator_type].split(".")
+        assets_by_key = {key: [] for key in keys}
+        for item in items:
+            key = self._normalize_indicator((item.get(section) or {}).get(field), indicator_type)
+            if key in assets_by_key:
+                assets_by_key[key].append(item)
+        return assets_by_key
+
+    def _get_cached_assets(self, site_id, keys, fields):
+        """
+        Get the cached assets of a site for the given normalized IP or MAC addresses.
 
-            for item in items:
-                item["site_name"] = site_name
-                action_result.add_data(item)
-            total_items += len(items)
+        Expired entries are dropped from the cache and the entries found are marked as the most recently used ones. The
+        entries fetched with fewer asset fields than the requested ones are considered as missing.
 
-        action_result.update_summary(
-            {
-                "total_assets": total_items,
-                "authorized_site_ids": authorized_site_ids,
-                "unauthorized_site_ids": unauthorized_site_ids,
-                "valid_ips": valid_ips,
-                "invalid_ips": invalid_ips,
-            }
-        )
-        if total_items == 0:
-            return action_result.set_status(phantom.APP_SUCCESS, "No assets found for the given IP address")
+        :param site_id: Site ID
+        :param keys: list of normalized IP or MAC addresses
+        :param fields: list of requested asset fields
+        :return: dictionary of the cached assets by normalized address
+        """
+        cache = self._state.setdefault(LANSWEEPER_ASSET_CACHE_STRING, {})
+        now = time.time()
+        cached_assets = {}
+        for key in keys:
+            cache_key = f"{site_id}|{key}"
+            entry = cache.pop(cache_key, None)
+            if not entry or now - entry.get("timestamp", 0) >= self._cache_ttl:
+                continue
+
+            if not set(fields).issubset(entry.get("fields", LANSWEEPER_ASSET_FIELDS)):
+                cache[cache_key] = entry
+                continue
+
+            # Re-insert the entry, so that the cache stays ordered from the least to the most recently used entry
+            cache[cache_key] = entry
+            cached_assets[key] = entry.get("items", [])
+
+        return cached_assets
+
+    def _cache_assets(self, site_id, assets_by_key, fields):
+        """
+        Store the assets of a site in the cache and evict the least recently used entries above the size limit.
 
-        message = f"Total assets: {total_items}, Total sites: {len(authorized_site_ids) + len(unauthorized_site_ids)}."
-        message += " Please refer to the summary in the action result dictionary for more information."
+        :param site_id: Site ID
+        :param assets_by_key: dictionary of the assets by normalized IP or MAC address
+        :param fields: list of asset fields the assets were fetched with
+        """
+        cache = self._state.setdefault(LANSWEEPER_ASSET_CACHE_STRING, {})
+        now = time.time()
+        for key, items in assets_by_key.items():
+            cache_key = f"{site_id}|{key}"
+            cache.pop(cache_key, None)
+            cache[cache_key] = {"timestamp": now, "fields": fields, "items": items}
 
-        return action_result.set_status(phantom.APP_SUCCESS, message)
+        while len(cache) > self._cache_max_entries:
+            cache.pop(next(iter(cache)))
 
-    def _handle_hunt_mac(self, param):
+    def _is_query_too_large(self, message):
         """
-        Fetch asset details based on the MAC address.
+        Check whether the server rejected a query because of its size or complexity.
 
-        :param param: dictionary of input parameters
-        :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR)
+        :param message: error message of the failed query
+        :return: True/False
         """
-        action_result = self.add_action_result(ActionResult(dict(param)))
-
-        site_ids = param.get("site_id")
-        # Get sites
-        ret_val, sites, authorized_site_ids, unauthorized_site_ids = self._get_sites(action_result, site_ids)
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
+        message = (message or "").lower()
+        return any(error in message for error in LANSWEEPER_QUERY_TOO_LARGE_ERRORS)
 
-        # Integer validation for 'max_results_per_site' action parameter
-        max_results_per_site = param.get("max_results_per_site", LANSWEEPER_DEFAULT_LIMIT)
-        ret_val, max_results_per_site = self._validate_integer(action_result, max_results_per_site, "max_results_per_site")
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
+    def _fetch_site_assets(self, site_id, indicator_type, key_batch, max_results, fields):
+        """
+        Fetch the assets of a single site for a batch of addresses. This method is executed on a worker thread of the fan-out.
 
-        # Convert the comma separated MAC(s) into list
-        comma_separated_macs = param["mac"]
-        ret_val, mac_list = self._filter_comma_seperated_fields(action_result, comma_separated_macs, "mac")
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
+        A separate action result is used for every batch, so that a failure of one site does not affect the others. If the
+        server rejects the query for being too large or too complex, the batch is split in halves which are fetched in turn.
 
-        # Validate and filter MAC addresses
-        valid_macs = []
-        invalid_macs = []
-        mac_condition_string = ""
+        :param site_id: Site ID
+        :param indicator_type: type of the addresses (ip/mac)
+        :param key_batch: list of normalized IP or MAC addresses to be fetched
+        :param max_results: maximum number of results to be fetched
+        :param fields: list of asset fields to be fetched
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, list of fetched batches as tuples of the normalized
+        addresses and their assets, action result of the batch
+        """
+        batch_action_result = ActionResult()
+        filters = build_any_of_filters(LANSWEEPER_INDICATOR_PATHS[indicator_type], key_batch)
+        variables = build_asset_variables([site_id], fields, filters, {"limit": min(max_results, self._page_size), "page": "FIRST"})
+
+        items = []
+        for ret_val, page_items in self._paginator(
+            action_result=batch_action_result,
+            endpoint=LANSWEEPER_QUERY_ENDPOINT,
+            query=get_asset_query(),
+            variables=variables,
+            max_results=max_results,
+        ):
+            if phantom.is_fail(ret_val):
+                break
+            items.extend(page_items)
+        else:
+            return phantom.APP_SUCCESS, [(key_batch, items)], batch_action_result
+
+        if len(key_batch) < 2 or not self._is_query_too_large(batch_action_result.get_message()):
+            return ret_val, [], batch_action_result
+
+        middle = len(key_batch) // 2
+        self.debug_print(f"Query for site ID '{site_id}' is too large. Retrying with batches of {middle} address(es)")
+        batches = []
+        for half in (key_batch[:middle], key_batch[middle:]):
+            ret_val, half_batches, batch_action_result = self._fetch_site_assets(site_id, indicator_type, half, max_results, fields)
+            if phantom.is_fail(ret_val):
+                return ret_val, [], batch_action_result
+            batches.extend(half_batches)
+
+        return phantom.APP_SUCCESS, batches, batch_action_result
+
+    def _fetch_aliased_sites_assets(self, site_ids, indicator_type, key_batch, max_results, fields):
+        """
+        Fetch the assets of several sites for a batch of addresses. This method is executed on a worker thread of the fan-out.
+
+        The first page of every site is fetched with a single query aliasing the selection of each site, and the next pages
+        are fetched only for the sites having more assets. If the server rejects the query for being too large or too
+        complex, the sites and then the addresses are split in halves which are fetched in turn. If the query fails for
+        other reasons, the sites returned by the server are kept and the sites it returned no data or an error for are
+        fetched one by one, so that a failing site does not fail the others.
+
+        :param site_ids: list of Site IDs
+        :param indicator_type: type of the addresses (ip/mac)
+        :param key_batch: list of normalized IP or MAC addresses to be fetched
+        :param max_results: maximum number of results to be fetched per site
+        :param fields: list of asset fields to be fetched
+        :return: dictionary of the status, list of fetched batches and action result by Site ID
+        """
+        batch_action_result = ActionResult()
+        filters = build_any_of_filters(LANSWEEPER_INDICATOR_PATHS[indicator_type], key_batch)
+        page_limit = min(max_results, self._page_size)
+        variables = build_asset_variables(site_ids, fields, filters, {"limit": page_limit, "page": "FIRST"}, aliased=True)
+
+        ret_val, response = self._make_rest_call(
+            action_result=batch_action_result,
+            url=LANSWEEPER_QUERY_ENDPOINT,
+            json={"query": get_asset_query(len(site_ids)), "variables": variables},
+            method="post",
+        )
+        if phantom.is_fail(ret_val):
+            if self._is_query_too_large(batch_action_result.get_message()):
+                if len(site_ids) > 1:
+                    middle = len(site_ids) // 2
+                    self.debug_print(f"Aliased query is too large. Retrying with batches of {middle} site(s)")
+                    results = self._fetch_aliased_sites_assets(site_ids[:middle], indicator_type, key_batch, max_results, fields)
+                    results.update(self._fetch_aliased_sites_assets(site_ids[middle:], indicator_type, key_batch, max_results, fields))
+                    return results
+
+                if len(key_batch) > 1:
+                    middle = len(key_batch) // 2
+                    self.debug_print(f"Aliased query is too large. Retrying with batches of {middle} address(es)")
+                    results = self._fetch_aliased_sites_assets(site_ids, indicator_type, key_batch[:middle], max_results, fields)
+                    for site_id, (ret_val, batches, half_action_result) in self._fetch_aliased_sites_assets(
+                        site_ids, indicator_type, key_batch[middle:], max_results, fields
+                    ).items():
+                        if phantom.is_fail(results[site_id][0]):
+                            continue
+                        if phantom.is_fail(ret_val):
+                            results[site_id] = (ret_val, [], half_action_result)
+                        else:
+                            results[site_id][1].extend(batches)
+                    return results
+
+            # Without a GraphQL response, e.g. when the server cannot be reached, none of the sites can be fetched
+            if not isinstance(response, dict):
+                return {site_id: (ret_val, [], batch_action_result) for site_id in site_ids}
+
+        data = response.get("data") or {}
+        failed_aliases = {error["path"][0] for error in response.get("errors") or [] if isinstance(error, dict) and error.get("path")}
+        self._performance.record(pages=1, items=sum(len(((site or {}).get("assetResources") or {}).get("items", [])) for site in data.values()))
+
+        results = {}
+        for index, site_id in enumerate(site_ids):
+            alias = f"site{index}"
+            if not data.get(alias) or alias in failed_aliases:
+                self.debug_print(f"Aliased query failed for site ID '{site_id}'. Fetching the site on its own")
+                results[site_id] = self._fetch_site_assets(site_id, indicator_type, key_batch, max_results, fields)
+                continue
+
+            asset_resources = data[alias].get("assetResources") or {}
+            items = asset_resources.get("items", [])[:max_results]
+
+            # Fetch the next pages only for the sites having more assets than the first page
+            cursor = asset_resources.get("pagination", {}).get("next")
+            if cursor and page_limit <= len(items) < max_results:
+                site_action_result = ActionResult()
+                for ret_val, page_items in self._paginator(
+                    action_result=site_action_result,
+                    endpoint=LANSWEEPER_QUERY_ENDPOINT,
+                    query=get_asset_query(),
+                    variables=build_asset_variables(
+                        [site_id], fields, filters, {"limit": min(self._page_size, max_results - len(items)), "cursor": cursor, "page": "NEXT"}
+                    ),
+                    max_results=max_results - len(items),
+                ):
+                    if phantom.is_fail(ret_val):
+                        results[site_id] = (ret_val, [], site_action_result)
+                        break
+                    items.extend(page_items)
+                if site_id in results:
+                    continue
+
+            results[site_id] = (phantom.APP_SUCCESS, [(key_batch, items)], batch_action_result)
+
+        return results
+
+    def _add_site_items(self, add_item, site_id, site_name, batches, max_results):
+        """
+        Annotate the assets of a site with the site name and add them to the results.
+
+        The assets matched by several batches are added once and at most the maximum results are added.
+
+        :param add_item: function adding an asset to the results, called with the asset and the site ID
+        :param site_id: Site ID
+        :param site_name: Site name
+        :param batches: list of lists of assets
+        :param max_results: maximum number of results to be added
+        :return: number of added assets
+        """
+        asset_ids = set()
+        for batch_items in batches:
+            for item in batch_items:
+                if len(asset_ids) >= max_results:
+                    return len(asset_ids)
+                if item.get("_id") in asset_ids:
+                    continue
+                asset_ids.add(item.get("_id"))
+                item["site_name"] = site_name
+                add_item(item, site_id)
+
+        return len(asset_ids)
+
+    def _get_run_assets(self, site_id, keys, fields):
+        """
+        Get the assets of a site fetched earlier in the same action run for the given normalized IP or MAC addresses.
+
+        :param site_id: Site ID
+        :param keys: list of normalized IP or MAC addresses
+        :param fields: list of requested asset fields
+        :return: dictionary of the assets by normalized address
+        """
+        if not self._run_assets:
+            return {}
+
+        run_assets = {}
+        for key in keys:
+            entry = self._run_assets.get(f"{site_id}|{key}")
+            if entry and set(fields).issubset(entry[0]):
+                run_assets[key] = entry[1]
+
+        return run_assets
+
+    def _prefetch_hunts(self, indicator_type):
+        """
+        Query the addresses of all the parameter sets of the action run at once, before the first one is handled.
+
+        The valid addresses of all the parameter sets are de-duplicated per site and every site is queried once for all
+        of them, with the union of the requested fields. The assets of the addresses are kept for the rest of the action
+        run, so that every parameter set is then answered from them, without querying the sites again. The parameter sets
+        failing the validation are skipped, their errors are reported when they are handled.
+
+        :param indicator_type: type of the addresses (ip/mac)
+        """
+        self._run_assets = {}
+        is_valid = self._is_mac if indicator_type == "mac" else self._is_ip
+        sites = {}
+        indicators_by_site = {}
+        fields = []
+        max_results = 0
+        bypass_cache = True
+        for param in self._param_sets:
+            param_action_result = ActionResult(dict(param))
+            ret_val, param_sites, _, _ = self._get_sites(param_action_result, param.get("site_id"))
+            if phantom.is_fail(ret_val) or not param.get(indicator_type):
+                continue
+
+            ret_val, param_max_results = self._validate_integer(
+                param_action_result, param.get("max_results_per_site", LANSWEEPER_DEFAULT_LIMIT), "max_results_per_site"
+            )
+            if phantom.is_fail(ret_val):
+                continue
+
+            ret_val, param_fields = self._validate_asset_fields(
+                param_action_result, param.get("fields", LANSWEEPER_DEFAULT_ASSET_FIELD_PRESET), indicator_type
+            )
+            if phantom.is_fail(ret_val):
+                continue
+
+            ret_val, values = self._filter_comma_seperated_fields(param_action_result, param[indicator_type], indicator_type)
+            if phantom.is_fail(ret_val):
+                continue
+
+            indicators = [value for value in values if is_valid(value)]
+            if not indicators:
+                continue
+
+            for site_id, site_name in param_sites.items():
+                sites[site_id] = site_name
+                indicators_by_site.setdefault(site_id, {}).update(dict.fromkeys(indicators))
+            fields = list(dict.fromkeys([*fields, *param_fields]))
+            max_results = max(max_results, param_max_results)
+            bypass_cache = bypass_cache and bool(param.get("bypass_cache", False))
+
+        # Query the sites sharing the same addresses together, so that they are batched and fanned out as a single hunt.
+        # The limit accounts for the assets of all the parameter sets, the batches exceeding it are not kept.
+        sites_by_indicators = {}
+        for site_id, indicators in indicators_by_site.items():
+            sites_by_indicators.setdefault(tuple(indicators), {})[site_id] = sites[site_id]
+
+        for indicators, indicator_sites in sites_by_indicators.items():
+            self.debug_print(
+                f"Prefetching {len(indicators)} address(es) of {len(self._param_sets)} parameter set(s) from {len(indicator_sites)} site(s)"
+            )
+            self._hunt_sites(
+                ActionResult(),
+                indicator_sites,
+                list(indicators),
+                indicator_type,
+                max_results * len(self._param_sets),
+                fields,
+                bypass_cache,
+                add_item=lambda item, site_id: None,
+            )
+
+    def _hunt_sites(self, action_result, sites, indicators, indicator_type, max_results, fields, bypass_cache=False, add_item=None):
+        """
+        Fetch the assets having any of the given IP or MAC addresses from all the given sites concurrently.
+
+        The addresses of the sites having a fresh snapshot are looked up in the snapshot. Otherwise, the addresses found in
+        the asset cache are served from it and the remaining ones are queried in batches of at most
+        'max_addresses_per_query' addresses. The batches of all the sites are queried in parallel with at most
+        'max_concurrent_sites' requests in flight, fewer while the adaptive concurrency limit is below it. If
+        'multi_site_query' is enabled, the sites sharing the same batch are queried with a single aliased query instead of
+        one query per site. The results are added to the action result in the order of the sites, irrespective of the
+        order in which the batches complete, and the assets matched by several batches are added once.
+
+        :param action_result: object of ActionResult class
+        :param sites: dictionary of site ID and site name
+        :param indicators: list of valid IP or MAC addresses
+        :param indicator_type: type of the addresses (ip/mac)
+        :param max_results: maximum number of results to be fetched per site
+        :param fields: list of asset fields to be fetched
+        :param bypass_cache: whether to skip the cache lookup and query all the addresses
+        :param add_item: function adding an asset to the results, called with the asset and the site ID, defaults to adding
+        it to the action result data
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, total number of fetched items, list of failed sites,
+        dictionary of the cache statistics
+        """
+        total_items = 0
+        failed_sites = []
+        cache_stats = {"cache_hits": 0, "cache_misses": 0, "snapshot_hits": 0, "prefetch_hits": 0}
+        add_item = add_item or (lambda item, site_id: action_result.add_data(item))
+        cache_enabled = self._cache_ttl > 0
+
+        # Collapse the different spellings of an address, so that it is queried once and shares a single cache entry
+        indicators_by_key = self._canonicalize_indicators(indicators, indicator_type)
+
+        with ThreadPoolExecutor(max_workers=self._max_concurrent_sites) as executor:
+            site_jobs = []
+            for site_id, site_name in sites.items():
+                # Answer all the addresses of a site from its snapshot when it is fresh
+                snapshot_assets = None if bypass_cache else self._get_snapshot_assets(site_id, indicator_type, indicators_by_key, fields)
+                if snapshot_assets is not None:
+                    cache_stats["snapshot_hits"] += len(snapshot_assets)
+                    site_jobs.append((site_id, site_name, snapshot_assets, []))
+                    continue
+
+                # The assets fetched earlier in the same action run are served even when bypassing the cache
+                run_assets = self._get_run_assets(site_id, indicators_by_key, fields)
+                cache_stats["prefetch_hits"] += len(run_assets)
+                keys = [key for key in indicators_by_key if key not in run_assets]
+                cached_assets = self._get_cached_assets(site_id, keys, fields) if cache_enabled and not bypass_cache else {}
+                missed_keys = [key for key in keys if key not in cached_assets]
+                cache_stats["cache_hits"] += len(cached_assets)
+                cache_stats["cache_misses"] += len(missed_keys)
+                cached_assets.update(run_assets)
+
+                key_batches = [
+                    tuple(missed_keys[index : index + self._max_addresses_per_query])
+                    for index in range(0, len(missed_keys), self._max_addresses_per_query)
+                ]
+                site_jobs.append((site_id, site_name, cached_assets, key_batches))
+
+            # Submit the batches, either one query per site or one aliased query for the sites sharing the same batch
+            futures = {}
+            if self._multi_site_query:
+                site_ids_by_batch = {}
+                for site_id, _, _, key_batches in site_jobs:
+                    for key_batch in key_batches:
+                        site_ids_by_batch.setdefault(key_batch, []).append(site_id)
+
+                for key_batch, site_ids in site_ids_by_batch.items():
+                    for index in range(0, len(site_ids), LANSWEEPER_MAX_SITES_PER_QUERY):
+                        site_id_batch = site_ids[index : index + LANSWEEPER_MAX_SITES_PER_QUERY]
+                        future = executor.submit(
+                            self._performance.call,
+                            ",".join(site_id_batch),
+                            self._fetch_aliased_sites_assets,
+                            site_id_batch,
+                            indicator_type,
+                            list(key_batch),
+                            max_results,
+                            fields,
+                        )
+                        for site_id in site_id_batch:
+                            futures.setdefault(site_id, []).append(future)
+            else:
+                for site_id, _, _, key_batches in site_jobs:
+                    futures[site_id] = [
+                        executor.submit(
+                            self._performance.call,
+                            site_id,
+                            self._fetch_site_assets,
+                            site_id,
+                            indicator_type,
+                            list(key_batch),
+                            max_results,
+                            fields,
+                        )
+                        for key_batch in key_batches
+                    ]
+
+            for site_id, site_name, cached_assets, _ in site_jobs:
+                site_batches = []
+                message = None
+                for future in futures.get(site_id, []):
+                    try:
+                        result = future.result()
+                        ret_val, batches, batch_action_result = result[site_id] if isinstance(result, dict) else result
+                    except Exception as e:
+                        message = self._get_error_message_from_exception(e)
+                        break
+
+                    if phantom.is_fail(ret_val):
+                        message = batch_action_result.get_message()
+                        break
+
+                    for key_batch, batch_items in batches:
+                        # Cache the results only if all the matching assets of the batch were fetched
+                        if (cache_enabled or self._run_assets is not None) and len(batch_items) < max_results:
+                            assets_by_key = self._group_assets_by_indicator(batch_items, key_batch, indicator_type)
+                            if cache_enabled:
+                                self._cache_assets(site_id, assets_by_key, fields)
+                            if self._run_assets is not None:
+                                self._run_assets.update({f"{site_id}|{key}": (fields, items) for key, items in assets_by_key.items()})
+                        site_batches.append(batch_items)
+
+                if message is not None:
+                    self.debug_print(f"Error occurred while fetching the assets for site ID '{site_id}'. {message}")
+                    failed_sites.append({"site_id": site_id, "message": message})
+                    continue
+
+                site_batches.extend(cached_assets.values())
+                with self._performance.site(site_id), self._performance.timer("add_data_time"):
+                    total_items += self._add_site_items(add_item, site_id, site_name, site_batches, max_results)
+
+        # Fail the action only if none of the sites could be queried
+        if len(failed_sites) == len(sites):
+            return action_result.set_status(phantom.APP_ERROR, failed_sites[0]["message"]), total_items, failed_sites, cache_stats
+
+        return phantom.APP_SUCCESS, total_items, failed_sites, cache_stats
+
+    def _is_operator_unsupported(self, message):
+        """
+        Check whether the server rejected a query because of an unsupported filter operator.
+
+        :param message: error message of the failed query
+        :return: True/False
+        """
+        message = (message or "").lower()
+        return any(error in message for error in LANSWEEPER_UNSUPPORTED_OPERATOR_ERRORS)
+
+    def _fetch_site_range_assets(self, site_id, ip_ranges, max_results, fields):
+        """
+        Fetch the assets of a single site within the given IP ranges. This method is executed on a worker thread of the fan-out.
+
+        The ranges are queried with the regular expressions matching their prefixes on the octet boundaries, in batches of
+        at most 'max_addresses_per_query' conditions. If the server rejects the regular expressions, the ranges are
+        expanded lazily and queried in batches of at most 'max_addresses_per_query' addresses instead. In both cases, the
+        assets are filtered with an index of the ranges, so that the list of the addresses of the ranges is never built.
+
+        :param site_id: Site ID
+        :param ip_ranges: list of tuples of the first and the last address of the ranges
+        :param max_results: maximum number of results to be fetched
+        :param fields: list of asset fields to be fetched
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, list of fetched assets, action result of the site
+        """
+        batch_action_result = ActionResult()
+        range_index = IPRangeIndex(ip_ranges)
+        section, field = LANSWEEPER_INDICATOR_PATHS["ip"].split(".")
+
+        def fetch(batches, operator):
+            items = []
+            for batch in batches:
+                filters = build_any_of_filters(LANSWEEPER_INDICATOR_PATHS["ip"], batch, operator)
+                page_limit = min(max_results - len(items), self._page_size)
+                variables = build_asset_variables([site_id], fields, filters, {"limit": page_limit, "page": "FIRST"})
+                for ret_val, page_items in self._paginator(
+                    action_result=batch_action_result,
+                    endpoint=LANSWEEPER_QUERY_ENDPOINT,
+                    query=get_asset_query(),
+                    variables=variables,
+                    max_results=max_results - len(items),
+                ):
+                    if phantom.is_fail(ret_val):
+                        return ret_val, []
+                    items.extend(item for item in page_items if (item.get(section) or {}).get(field) in range_index)
+
+                if len(items) >= max_results:
+                    break
+
+            return phantom.APP_SUCCESS, items
+
+        def chunks(values):
+            values = iter(values)
+            return iter(lambda: list(itertools.islice(values, self._max_addresses_per_query)), [])
+
+        ret_val, items = fetch(chunks(get_prefix_patterns(ip_ranges)), "REGEXP")
+        if phantom.is_fail(ret_val) and self._is_operator_unsupported(batch_action_result.get_message()):
+            total_addresses = sum(int(end) - int(start) + 1 for start, end in ip_ranges)
+            if total_addresses > LANSWEEPER_MAX_EXPANDED_RANGE_ADDRESSES:
+                message = LANSWEEPER_ERR_RANGE_TOO_LARGE.format(limit=LANSWEEPER_MAX_EXPANDED_RANGE_ADDRESSES)
+                return batch_action_result.set_status(phantom.APP_ERROR, message), [], batch_action_result
+
+            self.debug_print(f"Range filters are not supported for site ID '{site_id}'. Expanding {total_addresses} address(es)")
+            ret_val, items = fetch(chunks(iter_range_addresses(ip_ranges)), "EQUAL")
+
+        return ret_val, items, batch_action_result
+
+    def _hunt_ip_ranges(self, action_result, sites, ip_ranges, max_results, fields, add_item):
+        """
+        Fetch the assets within the given IP ranges from all the given sites concurrently.
+
+        :param action_result: object of ActionResult class
+        :param sites: dictionary of site ID and site name
+        :param ip_ranges: list of tuples of the first and the last address of the ranges
+        :param max_results: maximum number of results to be fetched per site
+        :param fields: list of asset fields to be fetched
+        :param add_item: function adding an asset to the results, called with the asset and the site ID
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, total number of fetched items, list of failed sites
+        """
+        total_items = 0
+        failed_sites = []
+        with ThreadPoolExecutor(max_workers=self._max_concurrent_sites) as executor:
+            futures = {
+                site_id: executor.submit(self._performance.call, site_id, self._fetch_site_range_assets, site_id, ip_ranges, max_results, fields)
+                for site_id in sites
+            }
+
+            for site_id, site_name in sites.items():
+                try:
+                    ret_val, items, site_action_result = futures[site_id].result()
+                    message = None if phantom.is_success(ret_val) else site_action_result.get_message()
+                except Exception as e:
+                    message = self._get_error_message_from_exception(e)
+
+                if message is not None:
+                    self.debug_print(f"Error occurred while fetching the assets in the IP ranges for site ID '{site_id}'. {message}")
+                    failed_sites.append({"site_id": site_id, "message": message})
+                    continue
+
+                with self._performance.site(site_id), self._performance.timer("add_data_time"):
+                    total_items += self._add_site_items(add_item, site_id, site_name, [items], max_results)
+
+        # Fail the action only if none of the sites could be queried
+        if len(failed_sites) == len(sites):
+            return action_result.set_status(phantom.APP_ERROR, failed_sites[0]["message"]), total_items, failed_sites
+
+        return phantom.APP_SUCCESS, total_items, failed_sites
+
+    def _handle_hunt_ip(self, param):
+        """
+        Fetch asset details based on the IP address.
+
+        :param param: dictionary of input parameters
+        :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR)
+        """
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        site_ids = param.get("site_id")
+        # Get sites
+        ret_val, sites, authorized_site_ids, unauthorized_site_ids = self._get_sites(action_result, site_ids)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # Integer validation for 'max_results_per_site' action parameter
+        max_results_per_site = param.get("max_results_per_site", LANSWEEPER_DEFAULT_LIMIT)
+        ret_val, max_results_per_site = self._validate_integer(action_result, max_results_per_site, "max_results_per_site")
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # Convert the comma separated IP(s) into list
+        comma_separated_ips = param["ip"]
+        ret_val, ip_list = self._filter_comma_seperated_fields(action_result, comma_separated_ips, "ip")
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # Validate and filter IP addresses, CIDR blocks and start-end ranges
+        valid_ips = []
+        valid_ip_ranges = []
+        ip_ranges = []
+        invalid_ips = []
+        for ip in ip_list:
+            ip_range = None if self._is_ip(ip) else parse_ip_range(ip)
+            if ip_range:
+                valid_ip_ranges.append(ip)
+                ip_ranges.append(ip_range)
+            elif self._is_ip(ip):
+                valid_ips.append(ip)
+            else:
+                invalid_ips.append(ip)
+                self.debug_print(LANSWEEPER_ERR_INVALID_IP.format(ip=ip))
+
+        # If all IP(s) are invalid, exit the code
+        if not valid_ips and not valid_ip_ranges:
+            return action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_INVALID_FIELDS.format(key="ip"))
+
+        # Validate the asset fields to be fetched
+        ret_val, fields = self._validate_asset_fields(action_result, param.get("fields", LANSWEEPER_DEFAULT_ASSET_FIELD_PRESET), "ip")
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # An asset matched by both an IP address and an IP range is added once and counts once in the assets of its site,
+        # which are limited for the addresses and the ranges together
+        asset_keys = set()
+        site_assets = {}
+
+        def add_item(item, site_id):
+            asset_key = (site_id, item.get("_id"))
+            if asset_key not in asset_keys and site_assets.get(site_id, 0) < max_results_per_site:
+                asset_keys.add(asset_key)
+                site_assets[site_id] = site_assets.get(site_id, 0) + 1
+                action_result.add_data(item)
+
+        failed_sites = []
+        cache_stats = {"cache_hits": 0, "cache_misses": 0, "snapshot_hits": 0, "prefetch_hits": 0}
+        if valid_ips:
+            ret_val, _, failed_sites, cache_stats = self._hunt_sites(
+                action_result, sites, valid_ips, "ip", max_results_per_site, fields, param.get("bypass_cache", False), add_item
+            )
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+        if ip_ranges:
+            ret_val, _, range_failed_sites = self._hunt_ip_ranges(action_result, sites, ip_ranges, max_results_per_site, fields, add_item)
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+            failed_sites.extend(range_failed_sites)
+
+        total_items = len(asset_keys)
+
+        action_result.update_summary(
+            {
+                "total_assets": total_items,
+                "authorized_site_ids": authorized_site_ids,
+                "unauthorized_site_ids": unauthorized_site_ids,
+                "valid_ips": valid_ips,
+                "valid_ip_ranges": valid_ip_ranges,
+                "invalid_ips": invalid_ips,
+                "indicator_matches": self._get_indicator_matches(action_result.get_data(), valid_ips, "ip"),
+                "failed_sites": failed_sites,
+                **cache_stats,
+            }
+        )
+        if total_items == 0:
+            return action_result.set_status(phantom.APP_SUCCESS, "No assets found for the given IP address")
+
+        message = f"Total assets: {total_items}, Total sites: {len(authorized_site_ids) + len(unauthorized_site_ids)}."
+        if failed_sites:
+            message += f" Failed sites: {len(failed_sites)}."
+        message += " Please refer to the summary in the action result dictionary for more information."
+
+        return action_result.set_status(phantom.APP_SUCCESS, message)
+
+    def _handle_hunt_mac(self, param):
+        """
+        Fetch asset details based on the MAC address.
+
+        :param param: dictionary of input parameters
+        :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR)
+        """
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        site_ids = param.get("site_id")
+        # Get sites
+        ret_val, sites, authorized_site_ids, unauthorized_site_ids = self._get_sites(action_result, site_ids)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # Integer validation for 'max_results_per_site' action parameter
+        max_results_per_site = param.get("max_results_per_site", LANSWEEPER_DEFAULT_LIMIT)
+        ret_val, max_results_per_site = self._validate_integer(action_result, max_results_per_site, "max_results_per_site")
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # Convert the comma separated MAC(s) into list
+        comma_separated_macs = param["mac"]
+        ret_val, mac_list = self._filter_comma_seperated_fields(action_result, comma_separated_macs, "mac")
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # Validate and filter MAC addresses
+        valid_macs = []
+        invalid_macs = []
         for mac in mac_list:
             if self._is_mac(mac):
                 valid_macs.append(mac)
-                mac_condition_string += f"""{{
-                    operator: EQUAL,
-                    path: "assetBasicInfo.mac",
-                    value: "{mac}"
-                }},"""
             else:
                 invalid_macs.append(mac)
                 self.debug_print(LANSWEEPER_ERR_INVALID_MAC.format(mac=mac))
 
         # If all MAC(s) are invalid, exit the code
-        if not mac_condition_string:
+        if not valid_macs:
             return action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_INVALID_FIELDS.format(key="mac"))
 
-        # Remove the comma from the last condition
-        mac_condition_string = mac_condition_string.rstrip(",")
+        # Validate the asset fields to be fetched
+        ret_val, fields = self._validate_asset_fields(action_result, param.get("fields", LANSWEEPER_DEFAULT_ASSET_FIELD_PRESET), "mac")
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
 
-        total_items = 0
+        ret_val, total_items, failed_sites, cache_stats = self._hunt_sites(
+            action_result, sites, valid_macs, "mac", max_results_per_site, fields, param.get("bypass_cache", False)
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
 
-        for site_id, site_name in sites.items():
-            # Create query
-            query = f"""query getAssetResources($pagination: AssetsPaginationInputValidated) {{
-                site(id: "{site_id}") {{
-                    assetResources (
-                        assetPagination: $pagination,
-                        fields: [
-                            "assetBasicInfo.name",
-                            "assetBasicInfo.domain",
-                            "assetBasicInfo.userName",
-                            "assetBasicInfo.userDomain",
-                            "assetBasicInfo.fqdn",
-                            "assetBasicInfo.description",
-                            "assetBasicInfo.type",
-                            "assetBasicInfo.mac",
-                            "assetBasicInfo.ipAddress",
-                            "assetBasicInfo.firstSeen"
-                            "assetBasicInfo.lastSeen"
-                            "assetCustom.model",
-                            "assetCustom.serialNumber",
-                            "assetCustom.manufacturer",
-                            "assetCustom.sku",
-                            "url"
-                        ],
-                        filters: {{
-                            conjunction: OR,
-                            conditions: [{mac_condition_string}]
-                        }}
-                    ) {{
-                        total
-                        pagination {{
-                            limit
-                            current
-                            next
-                            page
-                        }}
-                        items
-                    }}
-                }}
-            }}"""
-
-            variables = {"pagination": {"limit": min(max_results_per_site, LANSWEEPER_DEFAULT_PAGE_LIMIT), "page": "FIRST"}}
-
-            # make rest call
-            ret_val, items = self._paginator(
-                action_result=action_result,
-                endpoint=LANSWEEPER_QUERY_ENDPOINT,
-                query=query,
-                variables=variables,
-                max_results=max_results_per_site,
-            )
+        action_result.update_summary(
+            {
+                "total_assets": total_items,
+                "authorized_site_ids": authorized_site_ids,
+                "unauthorized_site_ids": unauthorized_site_ids,
+                "valid_macs": valid_macs,
+                "invalid_macs": invalid_macs,
+                "indicator_matches": self._get_indicator_matches(action_result.get_data(), valid_macs, "mac"),
+                "failed_sites": failed_sites,
+                **cache_stats,
+            }
+        )
+        if total_items == 0:
+            return action_result.set_status(phantom.APP_SUCCESS, "No assets found for the given MAC address")
+
+        message = f"Total assets: {total_items}, Total sites: {len(authorized_site_ids) + len(unauthorized_site_ids)}."
+        if failed_sites:
+            message += f" Failed sites: {len(failed_sites)}."
+        message += " Please refer to the summary in the action result dictionary for more information."
+
+        return action_result.set_status(phantom.APP_SUCCESS, message)
+
+    def _get_vault_file_path(self, action_result, vault_id):
+        """
+        Get the path of a vault file.
+
+        :param action_result: object of ActionResult class
+        :param vault_id: Vault ID of the file
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, path of the file or None in case of failure
+        """
+        import phantom.rules as ph_rules
+
+        try:
+            success, _, vault_info = ph_rules.vault_info(vault_id=vault_id)
+            vault_info = list(vault_info or [])
+        except Exception as e:
+            error_msg = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_VAULT_FILE_NOT_FOUND.format(error=error_msg)), None
+
+        if not success or not vault_info or not vault_info[0].get("path"):
+            return action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_VAULT_FILE_NOT_FOUND.format(error=vault_id)), None
+
+        return phantom.APP_SUCCESS, vault_info[0]["path"]
+
+    def _read_bulk_indicators(self, file_path):
+        """
+        Read the IP and MAC addresses of a CSV or newline separated file, row by row.
+
+        Every cell of the file is considered, so that the addresses can be mixed in any column. The different spellings of
+        an address are de-duplicated by its normalized value.
+
+        :param file_path: path of the file
+        :return: dictionary of the first spelling of the addresses by their normalized value for each type (ip/mac),
+        number of duplicate values, number of invalid values
+        """
+        indicators = {"ip": {}, "mac": {}}
+        duplicates = invalid = 0
+        with open(file_path, newline="", encoding="utf-8-sig", errors="replace") as vault_file:
+            for row in csv.reader(vault_file):
+                for value in row:
+                    value = value.strip()
+                    if not value:
+                        continue
+
+                    if self._is_ip(value):
+                        indicator_type = "ip"
+                    elif self._is_mac(value):
+                        indicator_type = "mac"
+                    else:
+                        invalid += 1
+                        continue
+
+                    key = self._normalize_indicator(value, indicator_type)
+                    if key in indicators[indicator_type]:
+                        duplicates += 1
+                    else:
+                        indicators[indicator_type][key] = value
+
+        return indicators, duplicates, invalid
+
+    def _flatten_asset(self, item, prefix=""):
+        """
+        Flatten the nested fields of an asset into the dot separated paths of the fields.
 
+        :param item: asset
+        :param prefix: path of the parent field
+        :return: dictionary of the field values by their path
+        """
+        flat_item = {}
+        for key, value in item.items():
+            path = f"{prefix}{key}"
+            if isinstance(value, dict):
+                flat_item.update(self._flatten_asset(value, f"{path}."))
+            else:
+                flat_item[path] = value
+
+        return flat_item
+
+    def _handle_bulk_hunt(self, param):
+        """
+        Fetch asset details based on the IP and MAC addresses of a vault file and write them to a new vault file.
+
+        :param param: dictionary of input parameters
+        :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR)
+        """
+        # The vault modules are imported by the bulk hunts only
+        import phantom.rules as ph_rules
+        from phantom.vault import Vault
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        # Get sites
+        ret_val, sites, authorized_site_ids, unauthorized_site_ids = self._get_sites(action_result, param.get("site_id"))
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # Integer validation for 'max_results_per_site' action parameter, the assets of a site are not limited by default
+        max_results_per_site = sys.maxsize
+        if param.get("max_results_per_site") is not None:
+            ret_val, max_results_per_site = self._validate_integer(action_result, param["max_results_per_site"], "max_results_per_site")
             if phantom.is_fail(ret_val):
                 return action_result.get_status()
 
+        output_format = param.get("output_format", LANSWEEPER_DEFAULT_BULK_OUTPUT_FORMAT).strip().lower()
+        if output_format not in LANSWEEPER_BULK_OUTPUT_FORMATS:
+            return action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_INVALID_OUTPUT_FORMAT)
+
+        # Validate the asset fields to be fetched, both the IP and MAC address fields are required to match the assets
+        ret_val, fields = self._validate_asset_fields(action_result, param.get("fields", LANSWEEPER_DEFAULT_ASSET_FIELD_PRESET), "ip")
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+        fields = list(dict.fromkeys([*fields, LANSWEEPER_INDICATOR_PATHS["mac"]]))
+
+        # Read the unique addresses of the vault file
+        ret_val, file_path = self._get_vault_file_path(action_result, param["vault_id"])
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        try:
+            indicators, duplicates, invalid = self._read_bulk_indicators(file_path)
+        except Exception as e:
+            error_msg = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_READING_VAULT_FILE.format(error=error_msg))
+
+        if not indicators["ip"] and not indicators["mac"]:
+            return action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_NO_VALID_INDICATORS)
+
+        # Write the assets to a file as soon as the results of a site are merged, instead of adding them to the action result
+        file_descriptor, output_path = tempfile.mkstemp(
+            dir=Vault.get_vault_tmp_dir(), prefix=LANSWEEPER_BULK_HUNT_FILE_PREFIX, suffix=f".{output_format}"
+        )
+        written_assets = set()
+        site_assets = {}
+        failed_sites = []
+        cache_stats = {"cache_hits": 0, "cache_misses": 0, "snapshot_hits": 0, "prefetch_hits": 0}
+        try:
+            with open(file_descriptor, "w", newline="", encoding="utf-8") as output_file:
+                writer = None
+                if output_format == "csv":
+                    writer = csv.DictWriter(output_file, fieldnames=["site_name", "_id", *fields], restval="", extrasaction="ignore")
+                    writer.writeheader()
+
+                def add_item(item, site_id):
+                    # An asset matched by both its IP and MAC address is written once and counts once in the assets of its
+                    # site, which are limited for all the addresses of the file together
+                    asset_key = (site_id, item.get("_id"))
+                    if asset_key in written_assets or site_assets.get(site_id, 0) >= max_results_per_site:
+                        return
+                    written_assets.add(asset_key)
+                    site_assets[site_id] = site_assets.get(site_id, 0) + 1
+                    if writer:
+                        writer.writerow(self._flatten_asset(item))
+                    else:
+                        output_file.write(f"{json.dumps(item)}\n")
+
+                for indicator_type, indicators_by_key in indicators.items():
+                    if not indicators_by_key:
+                        continue
+
+                    ret_val, _, type_failed_sites, type_cache_stats = self._hunt_sites(
+                        action_result,
+                        sites,
+                        list(indicators_by_key.values()),
+                        indicator_type,
+                        max_results_per_site,
+                        fields,
+                        param.get("bypass_cache", False),
+                        add_item,
+                    )
+                    if phantom.is_fail(ret_val):
+                        return action_result.get_status()
+
+                    failed_sites.extend(type_failed_sites)
+                    for key, value in type_cache_stats.items():
+                        cache_stats[key] += value
+
+            file_name = os.path.basename(output_path)
+            try:
+                success, message, vault_id = ph_rules.vault_add(
+                    container=self.get_container_id(), file_location=output_path, file_name=file_name
+                )
+            except Exception as e:
+                success, message = False, self._get_error_message_from_exception(e)
+            if not success:
+                return action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_ADDING_VAULT_FILE.format(error=message))
+        finally:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+
+        total_items = len(written_assets)
+        # The sites whose assets reached the maximum may have more matching assets than the ones written to the file
+        truncated_site_ids = [site_id for site_id in sites if site_assets.get(site_id, 0) >= max_results_per_site]
+        action_result.add_data({"vault_id": vault_id, "file_name": file_name, "total_assets": total_items})
+        action_result.update_summary(
+            {
+                "total_assets": total_items,
+                "vault_id": vault_id,
+                "authorized_site_ids": authorized_site_ids,
+                "unauthorized_site_ids": unauthorized_site_ids,
+                "truncated_site_ids": truncated_site_ids,
+                "total_ips": len(indicators["ip"]),
+                "total_macs": len(indicators["mac"]),
+                "duplicate_indicators": duplicates,
+                "invalid_indicators": invalid,
+                "failed_sites": failed_sites,
+                **cache_stats,
+            }
+        )
+
+        message = f"Total assets: {total_items}, Total addresses: {len(indicators['ip']) + len(indicators['mac'])}."
+        if failed_sites:
+            message += f" Failed sites: {len(failed_sites)}."
+        if truncated_site_ids:
+            message += f" Truncated sites: {len(truncated_site_ids)}."
+        message += " Please refer to the summary in the action result dictionary for more information."
+
+        return action_result.set_status(phantom.APP_SUCCESS, message)
+
+    def _get_snapshot(self, create=False):
+        """
+        Open the snapshot of the assets stored next to the state file, once per run.
+
+        :param create: whether to create the snapshot if it does not exist
+        :return: AssetSnapshot object or None if the snapshot does not exist
+        """
+        if self._snapshot is None:
+            snapshot_path = os.path.join(self.get_state_dir(), f"{self.get_asset_id()}{LANSWEEPER_SNAPSHOT_FILE_SUFFIX}")
+            if not create and not os.path.exists(snapshot_path):
+                return None
+            self._snapshot = AssetSnapshot(snapshot_path)
+
+        return self._snapshot
+
+    def _get_snapshot_assets(self, site_id, indicator_type, keys, fields):
+        """
+        Get the assets of a site matching the given normalized IP or MAC addresses from the snapshot of the site.
+
+        :param site_id: Site ID
+        :param indicator_type: type of the addresses (ip/mac)
+        :param keys: list of normalized IP or MAC addresses
+        :param fields: list of requested asset fields
+        :return: dictionary of the assets by normalized address, or None if the snapshot of the site is missing, older
+        than 'snapshot_ttl' or fetched with fewer asset fields than the requested ones
+        """
+        if not self._snapshot_ttl:
+            return None
+
+        try:
+            snapshot = self._get_snapshot()
+            site_info = snapshot.get_site_info(site_id) if snapshot else None
+            if not site_info or time.time() - site_info[0] >= self._snapshot_ttl or not set(fields).issubset(site_info[1]):
+                return None
+            return snapshot.lookup(site_id, indicator_type, keys)
+        except Exception as e:
+            self.debug_print(f"Unable to read the snapshot of site ID '{site_id}'. {self._get_error_message_from_exception(e)}")
+            return None
+
+    def _iter_site_snapshot(self, action_result, site_id, fields, watermarks, filters=None):
+        """
+        Fetch the assets of a site page by page, along with their normalized IP and MAC addresses.
+
+        :param action_result: object of ActionResult class
+        :param site_id: Site ID
+        :param fields: list of asset fields to be fetched
+        :param watermarks: dictionary of the 'lastSeen' high-water marks by Site ID, updated with the fetched assets
+        :param filters: filters of the assets to be fetched, None for all the assets
+        :return: generator of tuples of the asset ID, the normalized IP address, the normalized MAC address and the asset.
+        In case of failure, an exception is raised, so that the snapshot of the site is not updated
+        """
+        ip_section, ip_field = LANSWEEPER_INDICATOR_PATHS["ip"].split(".")
+        mac_section, mac_field = LANSWEEPER_INDICATOR_PATHS["mac"].split(".")
+        last_seen_section, last_seen_field = LANSWEEPER_LAST_SEEN_PATH.split(".")
+        variables = build_asset_variables([site_id], fields, filters, {"limit": self._page_size, "page": "FIRST"})
+        total_items = 0
+        for ret_val, items in self._paginator(
+            action_result=action_result,
+            endpoint=LANSWEEPER_QUERY_ENDPOINT,
+            query=get_asset_query(),
+            variables=variables,
+            max_results=sys.maxsize,
+        ):
+            if phantom.is_fail(ret_val):
+                raise Exception(action_result.get_message())
+
             for item in items:
-                item["site_name"] = site_name
-                action_result.add_data(item)
+                ip = (item.get(ip_section) or {}).get(ip_field)
+                mac = (item.get(mac_section) or {}).get(mac_field)
+                last_seen = (item.get(last_seen_section) or {}).get(last_seen_field)
+                if last_seen and last_seen > watermarks.get(site_id, ""):
+                    watermarks[site_id] = last_seen
+                yield (
+                    item.get("_id"),
+                    self._normalize_indicator(ip, "ip") if ip else None,
+                    self._normalize_indicator(mac, "mac") if mac else None,
+                    item,
+                )
+
             total_items += len(items)
+            self.save_progress(f"Site ID '{site_id}': {total_items} asset(s) fetched")
+
+    def _update_snapshot(self, param, incremental):
+        """
+        Fetch the assets of the sites and store them in the snapshot used to answer the hunts locally.
+
+        A full export replaces the snapshot of a site. An incremental sync only fetches the assets seen since the
+        'lastSeen' high-water mark of the site stored in the state file, and merges them into its snapshot. The sites without
+        any snapshot or high-water mark are fully exported.
+
+        :param param: dictionary of input parameters
+        :param incremental: whether to sync the snapshot incrementally
+        :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR)
+        """
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        # Get sites
+        ret_val, sites, authorized_site_ids, unauthorized_site_ids = self._get_sites(action_result, param.get("site_id"))
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        try:
+            snapshot = self._get_snapshot(create=True)
+        except Exception as e:
+            error_msg = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_OPENING_SNAPSHOT.format(error=error_msg))
+
+        # The sites are fetched one after the other, so that only a page of assets is held in memory at a time
+        fields = list(LANSWEEPER_ASSET_FIELDS)
+        watermarks = self._state.setdefault(LANSWEEPER_SNAPSHOT_WATERMARKS_STRING, {})
+        total_items = 0
+        failed_sites = []
+        for site_id, site_name in sites.items():
+            site_info = snapshot.get_site_info(site_id)
+            watermark = watermarks.get(site_id)
+            site_incremental = incremental and watermark and site_info and set(fields).issubset(site_info[1])
+            self.save_progress(f"{'Syncing' if site_incremental else 'Refreshing'} the snapshot of site ID '{site_id}'")
+
+            site_watermarks = {}
+            site_action_result = ActionResult()
+            try:
+                if site_incremental:
+                    filters = build_any_of_filters(LANSWEEPER_LAST_SEEN_PATH, [watermark], "GREATER_THAN")
+                    site_items = self._performance.call(
+                        site_id,
+                        snapshot.merge_site,
+                        site_id,
+                        self._iter_site_snapshot(site_action_result, site_id, fields, site_watermarks, filters),
+                    )
+                else:
+                    site_items = self._performance.call(
+                        site_id,
+                        snapshot.replace_site,
+                        site_id,
+                        fields,
+                        self._iter_site_snapshot(site_action_result, site_id, fields, site_watermarks),
+                    )
+            except Exception as e:
+                message = site_action_result.get_message() or self._get_error_message_from_exception(e)
+                self.debug_print(f"Error occurred while refreshing the snapshot of site ID '{site_id}'. {message}")
+                failed_sites.append({"site_id": site_id, "message": message})
+                continue
+
+            # Move the high-water mark only once the assets are stored
+            if site_id in site_watermarks:
+                watermarks[site_id] = max(site_watermarks[site_id], watermark or "") if site_incremental else site_watermarks[site_id]
+            total_items += site_items
+            action_result.add_data(
+                {
+                    "site_id": site_id,
+                    "site_name": site_name,
+                    "total_assets": site_items,
+                    "sync_type": "incremental" if site_incremental else "full",
+                    "last_seen": watermarks.get(site_id),
+                }
+            )
+
+        # Fail the action only if none of the sites could be fetched
+        if len(failed_sites) == len(sites):
+            return action_result.set_status(phantom.APP_ERROR, failed_sites[0]["message"])
 
         action_result.update_summary(
             {
                 "total_assets": total_items,
                 "authorized_site_ids": authorized_site_ids,
                 "unauthorized_site_ids": unauthorized_site_ids,
-                "valid_macs": valid_macs,
-                "invalid_macs": invalid_macs,
+                "failed_sites": failed_sites,
             }
         )
-        if total_items == 0:
-            return action_result.set_status(phantom.APP_SUCCESS, "No assets found for the given MAC address")
 
-        message = f"Total assets: {total_items}, Total sites: {len(authorized_site_ids) + len(unauthorized_site_ids)}."
-        message += " Please refer to the summary in the action result dictionary for more information."
+        message = f"Total assets: {total_items}, Total sites: {len(sites) - len(failed_sites)}."
+        if failed_sites:
+            message += f" Failed sites: {len(failed_sites)}."
 
         return action_result.set_status(phantom.APP_SUCCESS, message)
 
+    def _handle_refresh_snapshot(self, param):
+        """
+        Fetch all the assets of the sites and replace the snapshot used to answer the hunts locally.
+
+        :param param: dictionary of input parameters
+        :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR)
+        """
+        return self._update_snapshot(param, incremental=False)
+
+    def _handle_sync_snapshot(self, param):
+        """
+        Fetch the assets of the sites seen since the last refresh and merge them into the snapshot.
+
+        :param param: dictionary of input parameters
+        :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR)
+        """
+        return self._update_snapshot(param, incremental=True)
+
+    def _create_asset_artifact(self, item, site_id, site_name, container_id):
+        """
+        Create the artifact of a new or changed asset.
+
+        :param item: asset
+        :param site_id: Site ID
+        :param site_name: Site name
+        :param container_id: ID of the container of the artifact
+        :return: dictionary of the artifact
+        """
+        basic_info = item.get("assetBasicInfo") or {}
+        cef = {
+            "deviceHostname": basic_info.get("name"),
+            "deviceDnsDomain": basic_info.get("domain"),
+            "sourceAddress": basic_info.get("ipAddress"),
+            "sourceMacAddress": basic_info.get("mac"),
+            "lansweeperAssetId": item.get("_id"),
+            "lansweeperSiteId": site_id,
+            "lansweeperSiteName": site_name,
+            "lastSeen": basic_info.get("lastSeen"),
+            "url": item.get("url"),
+        }
+        return {
+            "container_id": container_id,
+            "name": LANSWEEPER_ARTIFACT_NAME,
+            "label": LANSWEEPER_ARTIFACT_LABEL,
+            "cef": {key: value for key, value in cef.items() if value},
+            "cef_types": {"sourceAddress": ["ip"], "sourceMacAddress": ["mac address"], "lansweeperSiteId": ["lansweeper site id"]},
+            "data": item,
+            # The same change of an asset is ingested once, even if it is fetched again after an interrupted poll
+            "source_data_identifier": f"{item.get('_id')}|{basic_info.get('lastSeen')}",
+            "run_automation": False,
+        }
+
+    def _poll_site(self, site_id, site_name, site_state, max_assets, persist):
+        """
+        Ingest the assets of a site seen since its 'lastSeen' high-water mark, up to the maximum number of assets.
+
+        The assets are fetched page by page with the cursor pagination and every page is saved with a single
+        'save_artifacts' call into a container created for the site on the first page. The cursor of the next page is
+        persisted after every page, so that a poll interrupted or stopped by the maximum number of assets resumes from it.
+        The high-water mark moves only once all the pages are ingested. The container is identified by the site and the
+        high-water mark the poll was started with, so that a resumed poll adds its assets to the same container.
+
+        :param site_id: Site ID
+        :param site_name: Site name
+        :param site_state: dictionary of the polling state of the site
+        :param max_assets: maximum number of assets to be ingested
+        :param persist: whether to persist the polling state after every page
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, number of ingested assets, ID of the container or None,
+                 error message or None
+        """
+        action_result = ActionResult()
+        # A resumed poll keeps the high-water mark it was started with, so that the cursor stays valid
+        watermark = site_state.get("cursor_watermark") if site_state.get("cursor") else site_state.get("watermark")
+        filters = build_any_of_filters(LANSWEEPER_LAST_SEEN_PATH, [watermark], "GREATER_THAN") if watermark else None
+        pagination = {"limit": min(self._page_size, max_assets), "page": "FIRST"}
+        if site_state.get("cursor"):
+            pagination.update({"cursor": site_state["cursor"], "page": "NEXT"})
+
+        page_state = {}
+        container_id = None
+        total_items = 0
+        last_seen_section, last_seen_field = LANSWEEPER_LAST_SEEN_PATH.split(".")
+        for ret_val, items in self._paginator(
+            action_result=action_result,
+            endpoint=LANSWEEPER_QUERY_ENDPOINT,
+            query=get_asset_query(),
+            variables=build_asset_variables([site_id], list(LANSWEEPER_ASSET_FIELDS), filters, pagination),
+            max_results=max_assets,
+            page_state=page_state,
+        ):
+            if phantom.is_fail(ret_val):
+                return action_result.get_status(), total_items, container_id, action_result.get_message()
+
+            if container_id is None:
+                ret_val, message, container_id = self.save_container(
+                    {
+                        "name": LANSWEEPER_CONTAINER_NAME.format(
+                            site_name=site_name, time=time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime())
+                        ),
+                        "description": LANSWEEPER_CONTAINER_DESCRIPTION.format(site_id=site_id),
+                        "source_data_identifier": f"{site_id}|{watermark or LANSWEEPER_INITIAL_POLL_STRING}",
+                    }
+                )
+                if phantom.is_fail(ret_val):
+                    return phantom.APP_ERROR, total_items, None, message
+
+            artifacts = [self._create_asset_artifact(item, site_id, site_name, container_id) for item in items]
+            # Run the automation once the last page of the poll is saved in the container
+            artifacts[-1]["run_automation"] = not page_state.get("cursor") or total_items + len(items) >= max_assets
+            ret_val, message, _ = self.save_artifacts(artifacts)
+            if phantom.is_fail(ret_val):
+                return phantom.APP_ERROR, total_items, container_id, message
+
+            total_items += len(items)
+            for item in items:
+                last_seen = (item.get(last_seen_section) or {}).get(last_seen_field)
+                if last_seen and last_seen > site_state.get("pending_watermark", ""):
+                    site_state["pending_watermark"] = last_seen
+
+            site_state["cursor"] = page_state.get("cursor")
+            site_state["cursor_watermark"] = watermark
+            if not site_state["cursor"]:
+                # All the changed assets are ingested, move the high-water mark
+                site_state["watermark"] = max(site_state.pop("pending_watermark", ""), watermark or "") or None
+                site_state.pop("cursor_watermark", None)
+            if persist:
+                self.save_state(self._state)
+            self.save_progress(f"Site ID '{site_id}': {total_items} asset(s) ingested")
+
+        return phantom.APP_SUCCESS, total_items, container_id, None
+
+    def _handle_on_poll(self, param):
+        """
+        Ingest the new and changed assets of the sites as artifacts.
+
+        :param param: dictionary of input parameters
+        :return: status(phantom.APP_SUCCESS/phantom.APP_ERROR)
+        """
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        # Get sites
+        ret_val, sites, _, _ = self._get_sites(action_result, self.get_config().get("poll_site_id"))
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # The manual poll ingests at most 'container_count' containers and 'artifact_count' artifacts without moving the
+        # polling state, the next scheduled poll adds the same assets to the same containers
+        persist = not self.is_poll_now()
+        max_assets = self._max_assets_per_poll
+        max_containers = len(sites)
+        poll_state = self._state.setdefault(LANSWEEPER_POLL_STATE_STRING, {})
+        if not persist:
+            ret_val, max_assets = self._validate_integer(action_result, param.get("artifact_count", max_assets), "artifact_count")
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+            ret_val, max_containers = self._validate_integer(action_result, param.get("container_count", max_containers), "container_count")
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+            poll_state = json.loads(json.dumps(poll_state))
+
+        total_items = 0
+        total_containers = 0
+        polled_sites = 0
+        failed_sites = []
+        for site_id, site_name in sites.items():
+            if total_items >= max_assets or total_containers >= max_containers:
+                break
+
+            self.save_progress(f"Polling the assets of site ID '{site_id}'")
+            ret_val, site_items, container_id, message = self._performance.call(
+                site_id, self._poll_site, site_id, site_name, poll_state.setdefault(site_id, {}), max_assets - total_items, persist
+            )
+            polled_sites += 1
+            total_items += site_items
+            if container_id is not None:
+                total_containers += 1
+            if phantom.is_fail(ret_val):
+                self.debug_print(f"Error occurred while polling the assets of site ID '{site_id}'. {message}")
+                failed_sites.append({"site_id": site_id, "message": message})
+
+        self.save_progress(f"Total assets ingested: {total_items}")
+        if failed_sites and len(failed_sites) == len(sites):
+            return action_result.set_status(phantom.APP_ERROR, failed_sites[0]["message"])
+
+        action_result.update_summary(
+            {
+                "total_containers": total_containers,
+                "total_artifacts": total_items,
+                "total_sites": polled_sites,
+                "failed_sites": failed_sites,
+            }
+        )
+
+        message = f"Total containers: {total_containers}, Total artifacts: {total_items}, Total sites: {polled_sites}."
+        if failed_sites:
+            message += f" Failed sites: {len(failed_sites)}."
+
+        return action_result.set_status(phantom.APP_SUCCESS, message)
+
+    def _handle_action(self, in_json, handle):
+        """
+        Keep the parameter sets of the action run, so that the hunts of all of them can be queried together, and run the action.
+
+        :param in_json: JSON string of the action run
+        :param handle: handle of the action run
+        :return: JSON string of the action results
+        """
+        try:
+            self._param_sets = json.loads(in_json).get("parameters") or []
+        except Exception:
+            self._param_sets = []
+
+        return super()._handle_action(in_json, handle)
+
     def handle_action(self, param):
         """
         Get current action identifier and call member function of its own to handle the action.
@@ -814,12 +2297,27 @@ class LansweeperConnector(BaseConnector):
             "list_authorized_sites": self._handle_list_authorized_sites,
             "hunt_ip": self._handle_hunt_ip,
             "hunt_mac": self._handle_hunt_mac,
+            "bulk_hunt": self._handle_bulk_hunt,
+            "refresh_snapshot": self._handle_refresh_snapshot,
+            "sync_snapshot": self._handle_sync_snapshot,
+            "on_poll": self._handle_on_poll,
         }
 
         if action in action_mapping.keys():
             action_function = action_mapping[action]
+            self._performance = PerformanceRecorder()
+
+            # Query the addresses of all the parameter sets of the run together, before handling the first one
+            if action in LANSWEEPER_BATCHED_HUNT_ACTIONS and len(self._param_sets) > 1 and self._run_assets is None:
+                self._prefetch_hunts(LANSWEEPER_BATCHED_HUNT_ACTIONS[action])
+
             ret_val = action_function(param)
 
+            performance = self._performance.get_summary()
+            self.debug_print("Performance of the action", dump_object=performance)
+            if param.get("include_performance", False) and self.get_action_results():
+                self.get_action_results()[-1].update_summary({"performance": performance})
+
         return ret_val
 
     def initialize(self):
@@ -847,6 +2345,101 @@ class LansweeperConnector(BaseConnector):
         config = self.get_config()
         self._identity_code = config["identity_code"]
 
+        # Validate the maximum number of sites to be queried concurrently
+        ret_val, self._max_concurrent_sites = self._validate_integer(
+            self, config.get("max_concurrent_sites", LANSWEEPER_DEFAULT_MAX_CONCURRENT_SITES), "max_concurrent_sites"
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        # Start the adaptive concurrency limit from the level reached by the previous action run, bounded by the maximum
+        concurrency_level = self._state.get(LANSWEEPER_CONCURRENCY_LEVEL_STRING)
+        if not isinstance(concurrency_level, (int, float)):
+            concurrency_level = self._max_concurrent_sites
+        self._concurrency_limiter = AIMDConcurrencyLimiter(
+            concurrency_level,
+            self._max_concurrent_sites,
+            decrease_factor=LANSWEEPER_CONCURRENCY_DECREASE_FACTOR,
+            latency_window=LANSWEEPER_LATENCY_WINDOW,
+            latency_ratio=LANSWEEPER_LATENCY_INCREASE_RATIO,
+        )
+
+        # Validate the asset cache settings, a TTL of zero disables the cache
+        ret_val, self._cache_ttl = self._validate_integer(self, config.get("cache_ttl", LANSWEEPER_DEFAULT_CACHE_TTL), "cache_ttl", True)
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._cache_max_entries = self._validate_integer(
+            self, config.get("cache_max_entries", LANSWEEPER_DEFAULT_CACHE_MAX_ENTRIES), "cache_max_entries", True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        # Validate the maximum number of addresses to be searched by a single query
+        ret_val, self._max_addresses_per_query = self._validate_integer(
+            self, config.get("max_addresses_per_query", LANSWEEPER_DEFAULT_MAX_ADDRESSES_PER_QUERY), "max_addresses_per_query"
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        self._multi_site_query = config.get("multi_site_query", False)
+
+        # Validate the number of assets to be requested per page
+        ret_val, self._page_size = self._validate_integer(self, config.get("page_size", LANSWEEPER_DEFAULT_PAGE_LIMIT), "page_size")
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        if self._page_size > LANSWEEPER_DEFAULT_PAGE_LIMIT:
+            return self.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_INVALID_PAGE_SIZE.format(limit=LANSWEEPER_DEFAULT_PAGE_LIMIT))
+
+        # Validate the retry budget and the client-side rate limit of the API calls, a rate of zero disables the limit
+        ret_val, self._max_retries = self._validate_integer(self, config.get("max_retries", LANSWEEPER_DEFAULT_MAX_RETRIES), "max_retries", True)
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, requests_per_second = self._validate_integer(
+            self, config.get("requests_per_second", LANSWEEPER_DEFAULT_REQUESTS_PER_SECOND), "requests_per_second", True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+        self._rate_limiter = TokenBucket(requests_per_second)
+
+        # Validate the policy of capturing the API responses in the debug data
+        self._debug_capture = config.get("debug_capture", LANSWEEPER_DEFAULT_DEBUG_CAPTURE)
+        if self._debug_capture not in LANSWEEPER_DEBUG_CAPTURE_POLICIES:
+            return self.set_status(phantom.APP_ERROR, LANSWEEPER_ERR_INVALID_DEBUG_CAPTURE)
+
+        ret_val, self._debug_capture_bytes = self._validate_integer(
+            self, config.get("debug_capture_bytes", LANSWEEPER_DEFAULT_DEBUG_CAPTURE_BYTES), "debug_capture_bytes", True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        if not isinstance(self._state.get(LANSWEEPER_ASSET_CACHE_STRING, {}), dict):
+            self.debug_print("Resetting the asset cache due to its unexpected format")
+            self._state.pop(LANSWEEPER_ASSET_CACHE_STRING)
+
+        # Validate the time after which the authorized sites index is refreshed, zero refreshes it only when missing
+        ret_val, self._authorized_sites_ttl = self._validate_integer(
+            self, config.get("authorized_sites_ttl", LANSWEEPER_DEFAULT_AUTH_SITES_TTL), "authorized_sites_ttl", True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        # Validate the time after which the snapshot of a site is not used anymore, zero disables the snapshot
+        ret_val, self._snapshot_ttl = self._validate_integer(
+            self, config.get("snapshot_ttl", LANSWEEPER_DEFAULT_SNAPSHOT_TTL), "snapshot_ttl", True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        # Validate the maximum number of assets to be ingested by a scheduled poll
+        ret_val, self._max_assets_per_poll = self._validate_integer(
+            self, config.get("max_assets_per_poll", LANSWEEPER_DEFAULT_MAX_ASSETS_PER_POLL), "max_assets_per_poll"
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
         # Get the list of stored authorized sites in the state file
         self._authorized_sites = self._state.get(LANSWEEPER_AUTH_SITES_STRING, {})
 
@@ -856,6 +2449,14 @@ class LansweeperConnector(BaseConnector):
             "Authorization": LANSWEEPER_AUTHORIZATION_HEADER.format(identity_code=self._identity_code),
         }
 
+        # Create a persistent session, so that the connections are kept alive and reused across the API calls.
+        # The connection pool is sized to serve all the concurrent site requests without blocking.
+        self._session = requests.Session()
+        self._session.headers.update(self._headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(self._max_concurrent_sites, LANSWEEPER_DEFAULT_POOL_SIZE))
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
         return phantom.APP_SUCCESS
 
     def finalize(self):
@@ -870,8 +2471,17 @@ class LansweeperConnector(BaseConnector):
         :return: status (success/failure)
         """
         # Save the state, this data is saved across actions and app upgrades
+        self._wait_for_authorized_sites_refresh()
+        self._state[LANSWEEPER_CONCURRENCY_LEVEL_STRING] = round(self._concurrency_limiter.limit, 2)
         self.save_state(self._state)
 
+        if self._snapshot:
+            self._snapshot.close()
+
+        # Close the pooled connections of the session
+        if self._session:
+            self._session.close()
+
         return phantom.APP_SUCCESS
 
 
@@ -22,9 +22,100 @@
 #
 
 LANSWEEPER_AUTH_SITES_STRING = "authorized_sites"
+LANSWEEPER_AUTH_SITES_TIMESTAMP_STRING = "authorized_sites_timestamp"
+LANSWEEPER_ASSET_CACHE_STRING = "asset_cache"
+LANSWEEPER_SNAPSHOT_FILE_SUFFIX = "_snapshot.db"
+LANSWEEPER_SNAPSHOT_WATERMARKS_STRING = "snapshot_watermarks"
+LANSWEEPER_POLL_STATE_STRING = "poll"
+LANSWEEPER_INITIAL_POLL_STRING = "initial"
 LANSWEEPER_AUTHORIZATION_HEADER = "Token {identity_code}"
 LANSWEEPER_DEFAULT_PAGE_LIMIT = 500
 LANSWEEPER_DEFAULT_LIMIT = 50
+LANSWEEPER_DEFAULT_MAX_CONCURRENT_SITES = 5
+LANSWEEPER_DEFAULT_POOL_SIZE = 10
+LANSWEEPER_DEFAULT_CACHE_TTL = 300
+LANSWEEPER_DEFAULT_CACHE_MAX_ENTRIES = 1000
+LANSWEEPER_DEFAULT_MAX_ADDRESSES_PER_QUERY = 100
+LANSWEEPER_MAX_SITES_PER_QUERY = 25
+LANSWEEPER_DEFAULT_MAX_RETRIES = 3
+LANSWEEPER_DEFAULT_REQUESTS_PER_SECOND = 10
+LANSWEEPER_DEFAULT_DEBUG_CAPTURE_BYTES = 4096
+LANSWEEPER_DEFAULT_AUTH_SITES_TTL = 3600
+LANSWEEPER_DEFAULT_SNAPSHOT_TTL = 0
+LANSWEEPER_DEFAULT_MAX_ASSETS_PER_POLL = 1000
+
+# Policies of capturing the API responses in the debug data
+LANSWEEPER_DEBUG_CAPTURE_OFF = "off"
+LANSWEEPER_DEBUG_CAPTURE_ERRORS_ONLY = "errors only"
+LANSWEEPER_DEBUG_CAPTURE_TRUNCATED = "truncated"
+LANSWEEPER_DEBUG_CAPTURE_POLICIES = (LANSWEEPER_DEBUG_CAPTURE_ERRORS_ONLY, LANSWEEPER_DEBUG_CAPTURE_TRUNCATED, LANSWEEPER_DEBUG_CAPTURE_OFF)
+LANSWEEPER_DEFAULT_DEBUG_CAPTURE = LANSWEEPER_DEBUG_CAPTURE_ERRORS_ONLY
+
+# Constants relating to the retries of the API calls, the delays are in seconds
+LANSWEEPER_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+LANSWEEPER_BACKOFF_BASE_DELAY = 1
+LANSWEEPER_BACKOFF_MAX_DELAY = 30
+LANSWEEPER_MAX_RETRY_AFTER_DELAY = 300
+
+# Constants relating to the adaptive limit of the API calls in flight, see AIMDConcurrencyLimiter
+LANSWEEPER_CONCURRENCY_LEVEL_STRING = "concurrency_level"
+LANSWEEPER_CONGESTION_STATUS_CODES = (429, 503)
+LANSWEEPER_CONCURRENCY_DECREASE_FACTOR = 0.5
+LANSWEEPER_LATENCY_WINDOW = 20
+LANSWEEPER_LATENCY_INCREASE_RATIO = 2
+
+# Lowercase fragments of the server errors for the queries that are too large or too complex to be evaluated
+LANSWEEPER_QUERY_TOO_LARGE_ERRORS = ("status code: 413", "too large", "too long", "too complex", "complexity", "exceeds the maximum")
+
+# Lowercase fragments of the server errors for the regular expression filters of the IP ranges being unsupported. The ranges
+# are then expanded into their addresses, up to the maximum number of addresses
+LANSWEEPER_UNSUPPORTED_OPERATOR_ERRORS = ("regexp", "operator")
+LANSWEEPER_MAX_EXPANDED_RANGE_ADDRESSES = 65536
+
+# Asset fields that can be fetched by the hunt actions and the presets of these fields
+LANSWEEPER_ASSET_FIELDS = (
+    "assetBasicInfo.name",
+    "assetBasicInfo.domain",
+    "assetBasicInfo.userName",
+    "assetBasicInfo.userDomain",
+    "assetBasicInfo.fqdn",
+    "assetBasicInfo.description",
+    "assetBasicInfo.type",
+    "assetBasicInfo.mac",
+    "assetBasicInfo.ipAddress",
+    "assetBasicInfo.firstSeen",
+    "assetBasicInfo.lastSeen",
+    "assetCustom.model",
+    "assetCustom.serialNumber",
+    "assetCustom.manufacturer",
+    "assetCustom.sku",
+    "url",
+)
+LANSWEEPER_ASSET_FIELD_PRESETS = {
+    "all": LANSWEEPER_ASSET_FIELDS,
+    "minimal": ("assetBasicInfo.name", "assetBasicInfo.ipAddress", "assetBasicInfo.mac"),
+}
+LANSWEEPER_DEFAULT_ASSET_FIELD_PRESET = "all"
+
+# Constants relating to the output file of the bulk hunt action
+LANSWEEPER_BULK_OUTPUT_FORMATS = ("jsonl", "csv")
+LANSWEEPER_DEFAULT_BULK_OUTPUT_FORMAT = "jsonl"
+LANSWEEPER_BULK_HUNT_FILE_PREFIX = "lansweeper_bulk_hunt_"
+
+# Asset fields holding the addresses searched by the hunt actions
+LANSWEEPER_INDICATOR_PATHS = {"ip": "assetBasicInfo.ipAddress", "mac": "assetBasicInfo.mac"}
+
+# Type of the addresses of the hunt actions whose parameter sets are queried together, see _prefetch_hunts
+LANSWEEPER_BATCHED_HUNT_ACTIONS = {"hunt_ip": "ip", "hunt_mac": "mac"}
+
+# Asset field holding the time an asset was last seen, used as the high-water mark of the incremental snapshot sync
+LANSWEEPER_LAST_SEEN_PATH = "assetBasicInfo.lastSeen"
+
+# Constants relating to the containers and artifacts of the ingested assets
+LANSWEEPER_CONTAINER_NAME = "Lansweeper asset changes - {site_name} - {time}"
+LANSWEEPER_CONTAINER_DESCRIPTION = "New and changed assets of the Lansweeper site '{site_id}'"
+LANSWEEPER_ARTIFACT_NAME = "Lansweeper Asset"
+LANSWEEPER_ARTIFACT_LABEL = "asset"
 
 # Endpoints
 LANSWEEPER_QUERY_ENDPOINT = "https://api.lansweeper.com/api/v2/graphql"
@@ -33,9 +124,9 @@ LANSWEEPER_QUERY_ENDPOINT = "https://api.lansweeper.com/api/v2/graphql"
 ERR_MSG_UNAVAILABLE = "Error message unavailable. Please check the asset configuration and|or action parameters."
 
 # Constants relating to 'validate_integer'
-LANSWEEPER_VALID_INT_MSG = "Please provide a valid integer value in the '{param}' action parameter"
-LANSWEEPER_NON_NEG_NON_ZERO_INT_MSG = "Please provide a valid non-zero positive integer value in the '{param}' action parameter"
-LANSWEEPER_NON_NEG_INT_MSG = "Please provide a valid non-negative integer value in the '{param}' action parameter"
+LANSWEEPER_VALID_INT_MSG = "Please provide a valid integer value in the '{param}' parameter"
+LANSWEEPER_NON_NEG_NON_ZERO_INT_MSG = "Please provide a valid non-zero positive integer value in the '{param}' parameter"
+LANSWEEPER_NON_NEG_INT_MSG = "Please provide a valid non-negative integer value in the '{param}' parameter"
 
 # Constants relating to success messages
 LANSWEEPER_SUCC_TEST_CONN_PASSED = "Test Connectivity Passed"
@@ -48,13 +139,31 @@ LANSWEEPER_ERR_INVALID_URL = "Error connecting to server. Invalid URL: '{url}'"
 LANSWEEPER_ERR_INVALID_SCHEMA = "Error connecting to server. No connection adapters were found for '{url}' URL."
 LANSWEEPER_ERR_CONNECTING_TO_SERVER = "Error connecting to server. Details: {error}"
 LANSWEEPER_ERR_TEST_CONN_FAILED = "Test Connectivity Failed"
-LANSWEEPER_ERR_NO_AUTHORIZED_SITES_FOUND = "No authorized sites found. Please run test connectivity or list authorized sites action first."
+LANSWEEPER_ERR_NO_AUTHORIZED_SITES_FOUND = "No authorized sites found. Please verify the permissions of the configured identity code."
 LANSWEEPER_ERR_INVALID_SITE_IDS = (
     "No authorized sites found for the given 'site_id' action parameter. "
     "Please run list authorized sites action to check the valid inputs for this parameter."
 )
 LANSWEEPER_ERR_PROCESSING_AUTH_SITE_RESPONSE = "Error occurred while processing the authorized sites response from the server"
 LANSWEEPER_ERR_INVALID_FIELDS = "Please provide a valid value in the '{key}' action parameter"
+LANSWEEPER_ERR_INVALID_PAGE_SIZE = "Please provide a value less than or equal to {limit} in the 'page_size' parameter"
+LANSWEEPER_ERR_INVALID_DEBUG_CAPTURE = "Please provide one of the following values in the 'debug_capture' parameter: {}".format(
+    ", ".join(LANSWEEPER_DEBUG_CAPTURE_POLICIES)
+)
+LANSWEEPER_ERR_INVALID_ASSET_FIELDS = "Invalid asset field(s) in the 'fields' action parameter: {fields}. Valid presets are: {presets}"
+LANSWEEPER_ERR_INVALID_OUTPUT_FORMAT = "Please provide one of the following values in the 'output_format' action parameter: {}".format(
+    ", ".join(LANSWEEPER_BULK_OUTPUT_FORMATS)
+)
+LANSWEEPER_ERR_VAULT_FILE_NOT_FOUND = "Unable to find the vault file. Details: {error}"
+LANSWEEPER_ERR_READING_VAULT_FILE = "Error occurred while reading the vault file. Details: {error}"
+LANSWEEPER_ERR_ADDING_VAULT_FILE = "Error occurred while adding the results to the vault. Details: {error}"
+LANSWEEPER_ERR_NO_VALID_INDICATORS = "No valid IP or MAC address found in the vault file"
+LANSWEEPER_ERR_RANGE_TOO_LARGE = "The IP ranges cover more than {limit} addresses, which is the maximum number of addresses that can be expanded"
+LANSWEEPER_ERR_RETRY_AFTER_TOO_LONG = (
+    "Error from server. Status Code: {status_code}. The server asked to retry the API call after {delay:g} second(s), which is "
+    "longer than the maximum of {limit} second(s) the connector waits for. Please retry the action later"
+)
+LANSWEEPER_ERR_OPENING_SNAPSHOT = "Error occurred while opening the snapshot of the assets. Details: {error}"
 LANSWEEPER_ERR_INVALID_IP = "IP validation failed for '{ip}'. Hence, skipping this IP address from being added to the conditions string."
 LANSWEEPER_ERR_INVALID_MAC = "MAC validation failed for '{mac}'. Hence, skipping this MAC address from being added to the conditions string."
 
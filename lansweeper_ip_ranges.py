@@ -0,0 +1,130 @@
+# File: lansweeper_ip_ranges.py
+#
+# Copyright (c) Lansweeper, 2022-2026
+#
+# This unpublished material is proprietary to Lansweeper.
+# All rights reserved. The methods and
+# techniques described herein are considered trade secrets
+# and/or confidential. Reproduction or distribution, in whole
+# or in part, is forbidden except by express written permission
+# of Lansweeper.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+#
+
+import ipaddress
+from bisect import bisect_right
+
+
+def parse_ip_range(value):
+    """
+    Parse an IPv4 CIDR block (e.g. 10.0.0.0/24) or an IPv4 start-end range (e.g. 10.0.0.1-10.0.0.20).
+
+    :param value: CIDR block or range
+    :return: tuple of the first and the last address of the range as IPv4Address objects, or None if the value is not
+    a valid CIDR block or range
+    """
+    try:
+        if "/" in value:
+            network = ipaddress.IPv4Network(value.strip(), strict=False)
+            return network.network_address, network.broadcast_address
+
+        start, end = (ipaddress.IPv4Address(address.strip()) for address in value.split("-"))
+    except ValueError:
+        return None
+
+    return (start, end) if start <= end else None
+
+
+def get_prefix_patterns(ip_ranges):
+    """
+    Get the regular expressions matching the IPv4 addresses of the given ranges, split on the octet boundaries.
+
+    Every range is split into CIDR blocks. The blocks sharing their leading octets are matched by a single expression
+    listing the values of their last significant octet, e.g. 10.1.4.0/22 is matched by ^10\\.1\\.(4|5|6|7)\\. and
+    10.0.0.1-10.0.0.3 is matched by ^10\\.0\\.0\\.(1|2|3)$.
+
+    :param ip_ranges: list of tuples of the first and the last address of the ranges
+    :return: list of regular expressions
+    """
+    values_by_prefix = {}
+    for start, end in ip_ranges:
+        for network in ipaddress.summarize_address_range(start, end):
+            octets = network.network_address.packed
+            fixed_octets, host_bits = divmod(network.prefixlen, 8)
+            if host_bits == 0 and fixed_octets < 4:
+                # The block covers every value of the remaining octets
+                values_by_prefix[octets[:fixed_octets]] = None
+                continue
+
+            fixed_octets = min(fixed_octets, 3)
+            first_value = octets[fixed_octets]
+            block_size = 2 ** (8 - host_bits) if host_bits else 1
+            values = values_by_prefix.setdefault(octets[:fixed_octets], set())
+            if values is not None:
+                values.update(range(first_value, first_value + block_size))
+
+    patterns = []
+    for prefix, values in values_by_prefix.items():
+        pattern = "^" + "".join(f"{octet}\\." for octet in prefix)
+        if values is not None and len(values) < 256:
+            pattern += "({})".format("|".join(str(value) for value in sorted(values)))
+            pattern += "$" if len(prefix) == 3 else "\\."
+        patterns.append(pattern)
+
+    return patterns
+
+
+def iter_range_addresses(ip_ranges):
+    """
+    Iterate over the IPv4 addresses of the given ranges, without building the list of the addresses.
+
+    :param ip_ranges: list of tuples of the first and the last address of the ranges
+    :return: generator of the addresses
+    """
+    for start, end in ip_ranges:
+        for address in range(int(start), int(end) + 1):
+            yield str(ipaddress.IPv4Address(address))
+
+
+class IPRangeIndex:
+    """Represent an index of IPv4 ranges, answering whether an address belongs to any of them."""
+
+    def __init__(self, ip_ranges):
+        """
+        Merge the overlapping and adjacent ranges and index them by their first address.
+
+        :param ip_ranges: list of tuples of the first and the last address of the ranges
+        """
+        self._starts = []
+        self._ends = []
+        for start, end in sorted((int(start), int(end)) for start, end in ip_ranges):
+            if self._ends and start <= self._ends[-1] + 1:
+                self._ends[-1] = max(self._ends[-1], end)
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+
+    def __contains__(self, address):
+        """
+        Check whether an address belongs to any of the ranges.
+
+        :param address: IPv4 address
+        :return: bool
+        """
+        try:
+            address = int(ipaddress.IPv4Address(address))
+        except ValueError:
+            return False
+
+        index = bisect_right(self._starts, address) - 1
+        return index >= 0 and address <= self._ends[index]
@@ -0,0 +1,131 @@
+# File: lansweeper_performance.py
+#
+# Copyright (c) Lansweeper, 2022-2026
+#
+# This unpublished material is proprietary to Lansweeper.
+# All rights reserved. The methods and
+# techniques described herein are considered trade secrets
+# and/or confidential. Reproduction or distribution, in whole
+# or in part, is forbidden except by express written permission
+# of Lansweeper.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+#
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Counters and timers recorded per site, the timers are in seconds
+PERFORMANCE_COUNTERS = ("requests", "retries", "pages", "items", "bytes_received")
+PERFORMANCE_TIMERS = ("wall_time", "request_time", "response_time", "wait_time", "decode_time", "add_data_time")
+
+
+class PerformanceRecorder:
+    """
+    Represent the thread-safe performance measures of an action, grouped by the sites they were recorded for.
+
+    The site is tracked per thread, so that the measures recorded by the API calls of a worker thread of the fan-out are
+    attributed to the site it is working for. The measures recorded outside of any site, e.g. by the retrieval of the
+    authorized sites, only count towards the total.
+    """
+
+    def __init__(self):
+        """Initialize the measures, the wall time of the action starts now."""
+        self._started_at = time.perf_counter()
+        self._measures = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record(self, **measures):
+        """
+        Add to the measures of the current site.
+
+        :param measures: values to be added by counter or timer name
+        """
+        site = getattr(self._local, "site", None)
+        with self._lock:
+            site_measures = self._measures.setdefault(site, dict.fromkeys(PERFORMANCE_COUNTERS + PERFORMANCE_TIMERS, 0))
+            for name, value in measures.items():
+                site_measures[name] += value
+
+    @contextmanager
+    def timer(self, name):
+        """
+        Add the time spent in the context to a timer of the current site.
+
+        :param name: timer name
+        """
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(**{name: time.perf_counter() - started_at})
+
+    @contextmanager
+    def site(self, site_id):
+        """
+        Attribute the measures recorded by the current thread in the context to a site.
+
+        :param site_id: Site ID, or the comma-separated Site IDs of a query selecting several sites
+        """
+        previous_site = getattr(self._local, "site", None)
+        self._local.site = site_id
+        try:
+            yield
+        finally:
+            self._local.site = previous_site
+
+    def call(self, site_id, func, *args, **kwargs):
+        """
+        Call a function working for a site and add its duration to the wall time of the site.
+
+        :param site_id: Site ID, or the comma-separated Site IDs of a query selecting several sites
+        :param func: function to be called
+        :return: return value of the function
+        """
+        with self.site(site_id), self.timer("wall_time"):
+            return func(*args, **kwargs)
+
+    def _format(self, measures):
+        """
+        Round the timers and add the throughputs.
+
+        :param measures: dictionary of the measures
+        :return: dictionary of the formatted measures
+        """
+        formatted = {name: round(value, 3) if name in PERFORMANCE_TIMERS else value for name, value in measures.items()}
+        formatted["bytes_per_second"] = round(measures["bytes_received"] / measures["request_time"]) if measures["request_time"] else 0
+        formatted["items_per_second"] = round(measures["items"] / measures["wall_time"], 1) if measures["wall_time"] else 0
+        return formatted
+
+    def get_summary(self):
+        """
+        Get the measures of the action.
+
+        :return: dictionary of the total measures of the action, whose wall time is the time elapsed since the recorder was
+        created, and of the list of the measures of every site
+        """
+        with self._lock:
+            measures = {site: dict(site_measures) for site, site_measures in self._measures.items()}
+
+        total = dict.fromkeys(PERFORMANCE_COUNTERS + PERFORMANCE_TIMERS, 0)
+        for site_measures in measures.values():
+            for name, value in site_measures.items():
+                total[name] += value
+        total["wall_time"] = time.perf_counter() - self._started_at
+
+        return {
+            "total": self._format(total),
+            "sites": [{"site_id": site, **self._format(site_measures)} for site, site_measures in measures.items() if site is not None],
+        }
@@ -0,0 +1,106 @@
+# File: lansweeper_query.py
+#
+# Copyright (c) Lansweeper, 2022-2026
+#
+# This unpublished material is proprietary to Lansweeper.
+# All rights reserved. The methods and
+# techniques described herein are considered trade secrets
+# and/or confidential. Reproduction or distribution, in whole
+# or in part, is forbidden except by express written permission
+# of Lansweeper.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+#
+
+from functools import cache
+
+
+AUTHORIZED_SITES_QUERY = """query getAuthorizedSites {
+    authorizedSites {
+        sites {
+            id
+            name
+        }
+    }
+}"""
+
+# Selection of the asset resources of a site, the site ID variable is substituted once per alias when the template is compiled
+ASSET_RESOURCES_SELECTION = """
+    {alias}site(id: ${site_variable}) {{
+        assetResources(assetPagination: $pagination, fields: $fields, filters: $filters) {{
+            total
+            pagination {{
+                limit
+                current
+                next
+                page
+            }}
+            items
+        }}
+    }}"""
+
+ASSET_RESOURCES_VARIABLES = "$pagination: AssetsPaginationInputValidated, $fields: [String!]!, $filters: AssetsFilterGroupInput"
+
+
+@cache
+def get_asset_query(site_count=None):
+    """
+    Get the query to fetch the asset resources of one or several sites.
+
+    The query only depends on the number of sites, the site IDs, the pagination, the fields and the filters being passed
+    as variables. Hence, it is compiled once per process for every number of sites and the server can cache its plan.
+
+    :param site_count: number of sites aliased as 'site<index>' with the 'site<index>' variables holding their IDs,
+    or None for a single site selected as 'site' with the 'siteId' variable holding its ID
+    :return: query string
+    """
+    if site_count is None:
+        site_variables = ["siteId"]
+        selections = ASSET_RESOURCES_SELECTION.format(alias="", site_variable="siteId")
+    else:
+        site_variables = [f"site{index}" for index in range(site_count)]
+        selections = "".join(ASSET_RESOURCES_SELECTION.format(alias=f"{variable}: ", site_variable=variable) for variable in site_variables)
+
+    variables = ", ".join([f"${variable}: ID!" for variable in site_variables] + [ASSET_RESOURCES_VARIABLES])
+    return f"query getAssetResources({variables}) {{{selections}\n}}"
+
+
+def build_asset_variables(site_ids, fields, filters, pagination, aliased=False):
+    """
+    Build the variables of the asset resources query.
+
+    :param site_ids: list of Site IDs
+    :param fields: list of asset fields to be fetched
+    :param filters: filters of the assets to be fetched
+    :param pagination: pagination of the assets to be fetched
+    :param aliased: whether the query aliases the sites, see get_asset_query
+    :return: dictionary of the variables
+    """
+    variables = {"pagination": pagination, "fields": list(fields), "filters": filters}
+    if aliased:
+        variables.update({f"site{index}": site_id for index, site_id in enumerate(site_ids)})
+    else:
+        variables["siteId"] = site_ids[0]
+
+    return variables
+
+
+def build_any_of_filters(path, values, operator="EQUAL"):
+    """
+    Build the filters matching the assets having any of the given values in the given field.
+
+    :param path: path of the asset field
+    :param values: values to be matched
+    :param operator: operator of the conditions
+    :return: dictionary of the filters
+    """
+    return {"conjunction": "OR", "conditions": [{"operator": operator, "path": path, "value": value} for value in values]}
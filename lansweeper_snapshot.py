@@ -0,0 +1,137 @@
+# File: lansweeper_snapshot.py
+#
+# Copyright (c) Lansweeper, 2022-2026
+#
+# This unpublished material is proprietary to Lansweeper.
+# All rights reserved. The methods and
+# techniques described herein are considered trade secrets
+# and/or confidential. Reproduction or distribution, in whole
+# or in part, is forbidden except by express written permission
+# of Lansweeper.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+#
+
+import json
+import sqlite3
+import time
+
+
+# Maximum number of addresses looked up by a single statement, below the limit of the SQLite host parameters
+LOOKUP_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sites (
+    site_id TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL,
+    fields TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS assets (
+    site_id TEXT NOT NULL,
+    asset_id TEXT NOT NULL,
+    ip TEXT,
+    mac TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (site_id, asset_id)
+);
+CREATE INDEX IF NOT EXISTS assets_ip ON assets (site_id, ip);
+CREATE INDEX IF NOT EXISTS assets_mac ON assets (site_id, mac);
+"""
+
+
+class AssetSnapshot:
+    """Represent an on-disk snapshot of all the assets of the sites, indexed on their normalized IP and MAC addresses."""
+
+    def __init__(self, path):
+        """
+        Open the snapshot database, creating it if missing.
+
+        :param path: path of the SQLite database file
+        """
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(SCHEMA)
+
+    def close(self):
+        """Close the snapshot database."""
+        self._connection.close()
+
+    def get_site_info(self, site_id):
+        """
+        Get when the snapshot of a site was refreshed and the asset fields it holds.
+
+        :param site_id: Site ID
+        :return: tuple of the refresh time and the list of asset fields, or None if the site has no snapshot
+        """
+        row = self._connection.execute("SELECT refreshed_at, fields FROM sites WHERE site_id = ?", (site_id,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def replace_site(self, site_id, fields, assets):
+        """
+        Replace the snapshot of a site in a single transaction, the previous snapshot is kept if the assets fail to be read.
+
+        :param site_id: Site ID
+        :param fields: list of asset fields the assets were fetched with
+        :param assets: iterable of tuples of the asset ID, the normalized IP address, the normalized MAC address and the asset
+        :return: number of stored assets
+        """
+        with self._connection:
+            self._connection.execute("DELETE FROM assets WHERE site_id = ?", (site_id,))
+            cursor = self._connection.executemany(
+                "INSERT OR REPLACE INTO assets (site_id, asset_id, ip, mac, data) VALUES (?, ?, ?, ?, ?)",
+                ((site_id, asset_id, ip, mac, json.dumps(asset)) for asset_id, ip, mac, asset in assets),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sites (site_id, refreshed_at, fields) VALUES (?, ?, ?)", (site_id, time.time(), json.dumps(fields))
+            )
+
+        return cursor.rowcount
+
+    def merge_site(self, site_id, assets):
+        """
+        Insert or update the given assets in the snapshot of a site in a single transaction and mark the site as refreshed.
+
+        :param site_id: Site ID
+        :param assets: iterable of tuples of the asset ID, the normalized IP address, the normalized MAC address and the asset
+        :return: number of merged assets
+        """
+        with self._connection:
+            cursor = self._connection.executemany(
+                "INSERT OR REPLACE INTO assets (site_id, asset_id, ip, mac, data) VALUES (?, ?, ?, ?, ?)",
+                ((site_id, asset_id, ip, mac, json.dumps(asset)) for asset_id, ip, mac, asset in assets),
+            )
+            self._connection.execute("UPDATE sites SET refreshed_at = ? WHERE site_id = ?", (time.time(), site_id))
+
+        return cursor.rowcount
+
+    def lookup(self, site_id, indicator_type, keys):
+        """
+        Get the assets of a site matching the given normalized IP or MAC addresses, using the index of the addresses.
+
+        :param site_id: Site ID
+        :param indicator_type: type of the addresses (ip/mac)
+        :param keys: list of normalized IP or MAC addresses
+        :return: dictionary of the assets by normalized address, with an empty list for the addresses without any asset
+        """
+        column = "mac" if indicator_type == "mac" else "ip"
+        keys = list(keys)
+        assets_by_key = {key: [] for key in keys}
+        for index in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            batch = keys[index : index + LOOKUP_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            rows = self._connection.execute(
+                f"SELECT {column}, data FROM assets WHERE site_id = ? AND {column} IN ({placeholders}) ORDER BY rowid",
+                (site_id, *batch),
+            )
+            for key, data in rows:
+                assets_by_key[key].append(json.loads(data))
+
+        return assets_by_key
@@ -0,0 +1,217 @@
+# File: lansweeper_throttle.py
+#
+# Copyright (c) Lansweeper, 2022-2026
+#
+# This unpublished material is proprietary to Lansweeper.
+# All rights reserved. The methods and
+# techniques described herein are considered trade secrets
+# and/or confidential. Reproduction or distribution, in whole
+# or in part, is forbidden except by express written permission
+# of Lansweeper.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+#
+
+import math
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """Represent a thread-safe token bucket limiting the rate of the API calls."""
+
+    def __init__(self, rate, capacity=None):
+        """
+        Initialize the bucket full of tokens.
+
+        :param rate: number of tokens added per second, zero disables the limit
+        :param capacity: maximum number of tokens, i.e. the allowed burst of calls (defaults to the rate)
+        """
+        self._rate = rate
+        self._capacity = capacity or max(rate, 1)
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Wait until a token is available and take it.
+
+        :return: time waited in seconds
+        """
+        if not self._rate:
+            return 0
+
+        waited = 0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self._rate
+
+            time.sleep(delay)
+            waited += delay
+
+
+def parse_retry_after(value):
+    """
+    Parse the value of a 'Retry-After' header, given either as a number of seconds or as an HTTP date.
+
+    :param value: header value
+    :return: delay in seconds or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+def get_backoff_delay(attempt, base, cap, retry_after=None):
+    """
+    Get the delay before retrying a failed API call.
+
+    The delay requested by the server is honoured in full when present, the caller deciding whether it is worth waiting
+    for. Otherwise, an exponential backoff with full jitter is used, so that the concurrent calls failing together do not
+    retry together.
+
+    :param attempt: zero-based number of the failed attempt
+    :param base: delay of the first retry in seconds
+    :param cap: maximum delay of the backoff in seconds
+    :param retry_after: value of the 'Retry-After' header of the failed call
+    :return: delay in seconds
+    """
+    delay = parse_retry_after(retry_after)
+    if delay is not None:
+        return delay
+
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class AIMDConcurrencyLimiter:
+    """
+    Represent a thread-safe limit of the number of API calls in flight, adapted to the congestion signals of the server.
+
+    The limit grows additively, by about one call per round of calls, while the calls succeed with a stable latency. It
+    is cut multiplicatively when a call is throttled or times out, or when the 95th percentile latency of a window of
+    calls rises above a multiple of the lowest one observed. The calls started before a cut do not cut the limit again,
+    so that a burst of throttled calls in flight only counts as one signal.
+    """
+
+    def __init__(self, limit, max_limit, min_limit=1, decrease_factor=0.5, latency_window=20, latency_ratio=2):
+        """
+        Initialize the limit.
+
+        :param limit: initial limit, e.g. the last level reached by a previous action run
+        :param max_limit: maximum limit
+        :param min_limit: minimum limit
+        :param decrease_factor: factor applied to the limit on a congestion signal
+        :param latency_window: number of calls whose latencies are compared with the lowest 95th percentile latency
+        :param latency_ratio: ratio of the lowest 95th percentile latency above which the latency is considered rising
+        """
+        self._min_limit = min_limit
+        self._max_limit = max(max_limit, min_limit)
+        self._limit = float(min(max(limit, self._min_limit), self._max_limit))
+        self._decrease_factor = decrease_factor
+        self._latency_window = latency_window
+        self._latency_ratio = latency_ratio
+        self._latencies = []
+        self._lowest_p95 = None
+        self._in_flight = 0
+        self._sequence = 0
+        self._decreased_at = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self):
+        """Get the current limit."""
+        return self._limit
+
+    def acquire(self):
+        """
+        Wait until the number of calls in flight is below the limit and count a new call.
+
+        :return: token of the call, to be passed to release
+        """
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+            self._sequence += 1
+            return self._sequence
+
+    def release(self, token, latency=None, congested=False):
+        """
+        Count the end of a call and adapt the limit to its outcome.
+
+        :param token: token returned by acquire
+        :param latency: latency of the call in seconds, None if the call failed without a response
+        :param congested: whether the call was throttled or timed out
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if congested or (latency is not None and self._is_latency_rising(latency)):
+                self._decrease(token)
+            elif latency is not None:
+                self._limit = min(self._limit + 1 / self._limit, self._max_limit)
+
+            self._condition.notify_all()
+
+    def _is_latency_rising(self, latency):
+        """
+        Add the latency of a call to the window and, once the window is full, check whether its 95th percentile latency
+        rose above the expected ratio of the lowest one observed.
+
+        :param latency: latency of the call in seconds
+        :return: True/False
+        """
+        self._latencies.append(latency)
+        if len(self._latencies) < self._latency_window:
+            return False
+
+        self._latencies.sort()
+        p95 = self._latencies[math.ceil(len(self._latencies) * 0.95) - 1]
+        self._latencies = []
+        if self._lowest_p95 is None or p95 < self._lowest_p95:
+            self._lowest_p95 = p95
+
+        return p95 > self._lowest_p95 * self._latency_ratio
+
+    def _decrease(self, token):
+        """
+        Cut the limit, unless the call was started before the last cut.
+
+        :param token: token of the call
+        """
+        if token <= self._decreased_at:
+            return
+
+        self._limit = max(self._limit * self._decrease_factor, self._min_limit)
+        self._decreased_at = self._sequence